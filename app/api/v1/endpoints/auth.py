@@ -1,32 +1,51 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, UTC
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.db.database import get_db
+from app.core.security import create_access_token, verify_password_async, get_password_hash_async
+from app.db.database import get_db, get_read_db
 from app.models.user import User
 from app.schemas.auth import Token, User as UserSchema, UserCreate
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+# Verified token -> user identity, so protected requests skip the user lookup
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+def invalidate_user(username: str) -> None:
+    """Forget cached identities of a user whose record changed."""
+    user_cache.remove_if(lambda user: user.username == username)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(User).where(User.username == username))
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    if not user:
+        return False
+    # Hand the connection back to the pool while bcrypt runs
+    db.expunge(user)
+    await db.rollback()
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_read_db)
+) -> UserSchema:
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -40,33 +59,49 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user_by_username(db, username)
+    user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
-    return user
+    
+    identity = UserSchema.model_validate(user)
+    # Hand the pooled connection back now: a streaming endpoint keeps this
+    # session open for as long as its client stays connected
+    await db.rollback()
+    # Never serve a token from the cache past its own expiry
+    expires_in = payload["exp"] - datetime.now(UTC).timestamp() if "exp" in payload else None
+    user_cache.set(token, identity, ttl=expires_in)
+    return identity
 
 @router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_username(db, user.username)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    already_registered = HTTPException(
+        status_code=400,
+        detail="Username already registered"
+    )
+    db_user = await get_user_by_username(db, user.username)
     if db_user:
-        raise HTTPException(
-            status_code=400,
-            detail="Username already registered"
-        )
+        raise already_registered
+    # Hand the writer connection back while bcrypt runs
+    await db.rollback()
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(username=user.username, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent registration of the same name committed while we hashed
+        await db.rollback()
+        raise already_registered
+    invalidate_user(db_user.username)
     return db_user
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,7 +116,7 @@ async def login(
 
 @router.post("/refresh-token", response_model=Token)
 async def refresh_token(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserSchema, Depends(get_current_user)]
 ):
     access_token = create_access_token(
         data={"sub": current_user.username},
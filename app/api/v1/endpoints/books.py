@@ -1,26 +1,79 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from typing import Annotated, AsyncIterator, Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.db.database import get_db, get_read_db, get_read_session_factory
+from app.db.catalog import get_catalog_version
+from app.db.changes import book_changes, changes_after, get_log_bounds
+from app.db.facets import FACET_COLUMNS, adjust_facets, facet_deltas, get_facets
+from app.db.search import books_fts, build_match_query
 from app.models.user import User
 from app.models.book import Book
-from app.schemas.book import BookCreate, Book as BookSchema, PaginatedBooks
+from app.core.config import settings
+from app.schemas.book import BookBatch, BookChanges, BookCreate, BookFacets, Book as BookSchema, BulkImportResult, PaginatedBooks
 from app.api.v1.endpoints.auth import get_current_user
-from app.core.errors import NotFoundError, ValidationError
+from app.core.errors import GoneError, NotFoundError, PreconditionFailedError, ValidationError
+from app.core.response_cache import CachedResponse, response_cache
+from app.core.responses import FastJSONResponse, encode_json
+from app.core.conditional import (
+    book_etag, check_if_match, collection_etag, none_match, not_modified,
+    not_modified_since, set_validators
+)
 from sse_starlette.sse import EventSourceResponse
+import csv
+from datetime import date
+import io
 import json
 import uuid
-from app.core.events import get_book_update_queue, remove_client, send_book_update
+import zlib
+from app.core.events import get_book_update_queue, remove_client, replay_events_since, send_book_update
+from app.core.counts import book_count
+from app.core.pagination import decode_cursor, encode_cursor, keyset_phases
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Columns clients may sort by; id is always appended as the final tie-breaker
+SORTABLE_COLUMNS = {
+    "title": Book.title,
+    "author": Book.author,
+    "genre": Book.genre,
+    "published_date": Book.published_date,
+}
+
+# Listing and search pages read these columns as plain rows, skipping the ORM
+# identity map and model validation. The order matches the Book schema, so a
+# row encodes to the same JSON the schema would produce.
+BOOK_FIELDS = list(BookSchema.model_fields)
+BOOK_COLUMNS = [getattr(Book, name) for name in BOOK_FIELDS]
+
+def book_rows_to_dicts(rows) -> list[dict]:
+    return [dict(zip(BOOK_FIELDS, row)) for row in rows]
+
+def parse_sort_keys(sort: str | None) -> list[str]:
+    """Split a sort parameter into keys; a leading '-' marks descending order."""
+    if not sort:
+        return []
+    keys = [key.strip() for key in sort.split(",") if key.strip()]
+    names = [key.removeprefix("-") for key in keys]
+    unknown = [name for name in names if name not in SORTABLE_COLUMNS]
+    if unknown:
+        raise ValidationError(f"Unsupported sort key(s): {', '.join(unknown)}")
+    if len(set(names)) != len(names):
+        raise ValidationError("Duplicate sort keys")
+    return keys
+
 @router.get("/stream", 
     summary="Stream book updates",
-    description="SSE endpoint for real-time book updates")
+    description="SSE endpoint for real-time book updates. Reconnecting clients "
+                "that send Last-Event-ID receive the events they missed")
 async def stream_book_updates(
     background_tasks: BackgroundTasks,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
     current_user: User = Depends(get_current_user)
 ):
     client_id = str(uuid.uuid4())
@@ -37,14 +90,35 @@ async def stream_book_updates(
                 })
             }
             
+            # Subscribed before reading the log, so nothing falls in between;
+            # live events already covered by the replay are skipped below
+            replayed_through = 0
+            if last_event_id is not None:
+                missed = await replay_events_since(int(last_event_id)) if last_event_id.isdigit() else None
+                if missed is not None:
+                    # Live events up to the client's own ID are ones it has
+                    # already seen, even if this worker delivers them later
+                    replayed_through = int(last_event_id)
+                else:
+                    yield {
+                        "event": "resync",
+                        "data": json.dumps({
+                            "status": "resync",
+                            "last_event_id": last_event_id
+                        })
+                    }
+                for event in missed or []:
+                    replayed_through = event.id
+                    yield event.frame
+            
             while True:
-                message = await queue.get()
-                if message is None:
+                event = await queue.get()
+                if event is None:
                     break
-                yield {
-                    "event": message["event"],
-                    "data": json.dumps(message)
-                }
+                if event.id <= replayed_through:
+                    continue
+                # Pre-encoded frame shared with every other subscriber
+                yield event.frame
         except Exception:
             pass
         finally:
@@ -59,12 +133,14 @@ async def stream_book_updates(
 async def create_book(
     book: BookCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_book = Book(**book.model_dump())
     db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
+    await adjust_facets(db, facet_deltas(added=[db_book]))
+    # Every column is filled client-side, so the instance is already complete;
+    # a refresh would reopen a write transaction on the single writer connection
+    await db.commit()
     
     book_data = {
         "id": db_book.id,
@@ -75,74 +151,463 @@ async def create_book(
         "genre": db_book.genre
     }
     
+    book_count.adjust(1)
+    
     # Send update event
     await send_book_update("created", db_book.id, book_data)
     return db_book
 
+async def iter_bulk_rows(request: Request) -> AsyncIterator[bytes | dict]:
+    """Yield raw rows from a JSON array body or, incrementally, an NDJSON body."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise ValidationError("Request body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise ValidationError("Request body must be a JSON array or NDJSON")
+    for row in rows:
+        yield row
+
+@router.post("/bulk",
+    response_model=BulkImportResult,
+    summary="Import many books",
+    description="Create books from a JSON array or an NDJSON stream "
+                "(Content-Type: application/x-ndjson). Rows are validated and "
+                "inserted in chunks, one transaction and one SSE event per chunk")
+async def bulk_create_books(
+    request: Request,
+    chunk_size: int = Query(settings.BULK_INSERT_CHUNK_SIZE, ge=1, le=10000, description="Rows per transaction"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    inserted = chunks = 0
+    
+    async def flush(rows: list[dict]):
+        nonlocal inserted, chunks
+        ids = (await db.scalars(
+            insert(Book).returning(Book.id, sort_by_parameter_order=True), rows
+        )).all()
+        await adjust_facets(db, facet_deltas(added=rows))
+        await db.commit()
+        inserted += len(ids)
+        chunks += 1
+        book_count.adjust(len(ids))
+        # One aggregated event per chunk instead of one per book
+        await send_book_update("bulk_created", None, {"count": len(ids), "ids": ids})
+    
+    pending: list[dict] = []
+    row_number = 0
+    async for raw in iter_bulk_rows(request):
+        row_number += 1
+        try:
+            if isinstance(raw, bytes):
+                book = BookCreate.model_validate_json(raw)
+            else:
+                book = BookCreate.model_validate(raw)
+        except PydanticValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            raise ValidationError(
+                f"Row {row_number}: {field + ': ' if field else ''}{error['msg']} "
+                f"({inserted} rows were imported before this row's chunk)"
+            )
+        pending.append(book.model_dump())
+        if len(pending) >= chunk_size:
+            await flush(pending)
+            pending = []
+    
+    if pending:
+        await flush(pending)
+    return {"inserted": inserted, "chunks": chunks}
+
+@router.get("/search",
+    response_model=PaginatedBooks,
+    summary="Search books",
+    description="Full-text search over title, author and summary, best matches first. "
+                "End a word with * for a prefix match, e.g. tolk*")
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms; all must match"),
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    include_total: bool = Query(False, description="Count all matches (slower for common terms)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    match = build_match_query(q)
+    if match is None:
+        raise ValidationError("Search query must contain at least one word")
+    
+    condition = books_fts.c.books_fts.op("MATCH")(match)
+    total = total_pages = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(books_fts).where(condition))
+        total_pages = (total + limit - 1) // limit
+    
+    query = (
+        select(*BOOK_COLUMNS)
+        .join(books_fts, books_fts.c.rowid == Book.id)
+        .where(condition)
+        .order_by(books_fts.c.rank, Book.id)
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+    rows = (await db.execute(query)).all()
+    
+    return FastJSONResponse({
+        "total": total,
+        "items": book_rows_to_dicts(rows),
+        "page": page,
+        "pages": total_pages,
+        "next_cursor": None
+    })
+
+EXPORT_COLUMNS = [Book.id, Book.title, Book.author, Book.published_date, Book.summary, Book.genre]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def encode_export_rows(rows, format: str, header: bool) -> bytes:
+    names = [column.key for column in EXPORT_COLUMNS]
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(names)
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
+    return "".join(json.dumps(dict(zip(names, row)), default=date.isoformat) + "\n" for row in rows).encode()
+
+@router.get("/export",
+    summary="Export the catalog",
+    description="Stream every book as NDJSON or CSV straight from a database cursor, "
+                "optionally gzip-compressed (Content-Encoding: gzip)")
+async def export_books(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Output format"),
+    compress: bool = Query(False, description="gzip the response body"),
+    current_user: User = Depends(get_current_user),
+    session_factory = Depends(get_read_session_factory)
+):
+    batch_size = 1000
+    
+    async def generate():
+        # The body is produced after this handler returns, so the stream
+        # owns its session instead of borrowing the request's
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        header = True
+        async with session_factory() as session:
+            result = await session.stream(
+                select(*EXPORT_COLUMNS).order_by(Book.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for rows in result.partitions():
+                chunk = encode_export_rows(rows, format, header)
+                header = False
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+        if header and format == "csv":
+            chunk = encode_export_rows([], format, header)
+            yield compressor.compress(chunk) if compressor is not None else chunk
+        if compressor is not None:
+            yield compressor.flush()
+    
+    headers = {"Content-Disposition": f'attachment; filename="books.{format}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(generate(), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@router.get("/batch",
+    response_model=BookBatch,
+    summary="Get many books",
+    description="Fetch up to BATCH_GET_MAX_IDS books in one request, e.g. the book_ids "
+                "seen on the event stream. Books come back in the order asked for; "
+                "IDs with no book are listed under missing")
+async def get_books_batch(
+    ids: Annotated[list[str], Query(description="Book IDs, repeated (ids=1&ids=2) or comma-separated (ids=1,2)")],
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        book_ids = list(dict.fromkeys(int(part) for value in ids for part in value.split(",") if part.strip()))
+    except ValueError:
+        raise ValidationError("ids must be integers")
+    if not book_ids:
+        raise ValidationError("At least one id is required")
+    if len(book_ids) > settings.BATCH_GET_MAX_IDS:
+        raise ValidationError(f"At most {settings.BATCH_GET_MAX_IDS} ids per request")
+    
+    # One IN query, then back into the order asked for
+    rows = await db.execute(select(*BOOK_COLUMNS).where(Book.id.in_(book_ids)))
+    books = {row.id: dict(zip(BOOK_FIELDS, row)) for row in rows}
+    return FastJSONResponse({
+        "items": [books[book_id] for book_id in book_ids if book_id in books],
+        "missing": [book_id for book_id in book_ids if book_id not in books]
+    })
+
+@router.get("/facets",
+    response_model=BookFacets,
+    summary="Count books per genre and author",
+    description="Book counts for each genre and author, most common first. Counts are "
+                "kept up to date by every write, so this never scans the catalog")
+async def get_book_facets(
+    request: Request,
+    facet: Annotated[list[Literal["genre", "author"]] | None, Query(description="Facets to return; all by default")] = None,
+    limit: int = Query(100, ge=1, le=10000, description="Most values returned per facet"),
+    if_none_match: str | None = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Counts change only when books do, so they are cached like listings
+    etag = collection_etag(await get_catalog_version(db), "facets?" + request.url.query)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    cached = response_cache.get(("facets", etag))
+    if cached is None:
+        result = {name: await get_facets(db, name, limit) for name in facet or FACET_COLUMNS}
+        cached = CachedResponse(encode_json(result), etag)
+        response_cache.set(("facets", etag), cached)
+    
+    response = Response(cached.body, media_type="application/json")
+    set_validators(response, etag)
+    return response
+
+@router.get("/changes",
+    response_model=BookChanges,
+    summary="Changes since a position",
+    description="Page through creates, updates and deletes in commit order, each with "
+                "the book's current state. Omit since to get the current position, "
+                "then pass each response's next_since. Treat created and updated alike: "
+                "older entries for a book may have been compacted into its latest one. "
+                "410 means the position is older than the retained log; resync in full")
+async def get_book_changes(
+    since: int | None = Query(None, ge=0, description="seq of the last change already applied"),
+    limit: int = Query(100, ge=1, description="Most changes returned"),
+    include_books: bool = Query(True, description="Include each book's current state"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if limit > settings.CHANGE_FEED_MAX_LIMIT:
+        raise ValidationError(f"At most {settings.CHANGE_FEED_MAX_LIMIT} changes per request")
+    
+    # Bounds and rows come from the same read transaction, so they agree
+    compacted_through, head = await get_log_bounds(db)
+    if since is None:
+        return FastJSONResponse({"changes": [], "next_since": head, "has_more": False})
+    if since < compacted_through or since > head:
+        raise GoneError(f"Changes after {since} are no longer available; resync from a full listing")
+    
+    rows = (await db.execute(changes_after(since, limit + 1, include_books, BOOK_COLUMNS))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    width = len(book_changes.c)
+    changes = []
+    for row in rows:
+        change = dict(zip(book_changes.c.keys(), row[:width]))
+        if include_books:
+            # The joined columns are all NULL once the book is deleted
+            book = dict(zip(BOOK_FIELDS, row[width:]))
+            change["book"] = book if book["id"] is not None else None
+        changes.append(change)
+    
+    return FastJSONResponse({
+        "changes": changes,
+        "next_since": rows[-1].seq if rows else since,
+        "has_more": has_more
+    })
+
 @router.get("/{book_id}", 
     response_model=BookSchema,
     summary="Get a specific book",
-    description="Retrieve a book by its ID")
-def get_book(
+    description="Retrieve a book by its ID. Send If-None-Match or If-Modified-Since "
+                "to get a bodiless 304 when your copy is current")
+async def get_book(
     book_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
+    db_book = await db.get(Book, book_id)
     if db_book is None:
         raise NotFoundError("Book")
+    
+    etag = book_etag(db_book)
+    # If-Modified-Since only applies when If-None-Match is absent
+    if if_none_match is not None:
+        current = none_match(if_none_match, etag)
+    else:
+        current = not_modified_since(if_modified_since, db_book.updated_at)
+    if current:
+        return not_modified(etag, db_book.updated_at)
+    
+    set_validators(response, etag, db_book.updated_at)
     return db_book
 
 @router.get("/", 
     response_model=PaginatedBooks,
     summary="Get all books",
-    description="Retrieve all books with pagination support")
-def get_books(
+    description="Retrieve all books with page or cursor (keyset) pagination")
+async def get_books(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number for pagination"),
+    cursor: str | None = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    sort: str | None = Query(None, description="Comma-separated sort keys applied before id, e.g. author,title"),
+    include_total: bool = Query(True, description="Set to false to skip counting books"),
+    total_mode: Literal["exact", "estimate"] = Query("exact", alias="total", description="'estimate' serves a cached count instead of running COUNT(*)"),
+    genre: str | None = Query(None, description="Only books in this genre"),
+    author: str | None = Query(None, description="Only books by this author"),
+    published_from: date | None = Query(None, description="Earliest publication date, inclusive"),
+    published_to: date | None = Query(None, description="Latest publication date, inclusive"),
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # Read the catalog version before any rows, so the ETag can only be
+    # older than the page it labels, never newer
+    etag = collection_etag(await get_catalog_version(db), request.url.query)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    cached = response_cache.get(("list", etag))
+    if cached is None:
+        result = await list_books_page(
+            page, cursor, sort, include_total, total_mode, genre, author,
+            published_from, published_to, db
+        )
+        cached = CachedResponse(encode_json(result), etag)
+        response_cache.set(("list", etag), cached)
+    
+    response = Response(cached.body, media_type="application/json")
+    set_validators(response, etag)
+    return response
+
+async def list_books_page(
+    page: int,
+    cursor: str | None,
+    sort: str | None,
+    include_total: bool,
+    total_mode: str,
+    genre: str | None,
+    author: str | None,
+    published_from: date | None,
+    published_to: date | None,
+    db: AsyncSession
+) -> dict:
     items_per_page = 50
-    total = db.query(Book).count()
-    logger.info(f"Total books in DB: {total}")
+    sort_keys = parse_sort_keys(sort)
+    names = [key.removeprefix("-") for key in sort_keys]
+    # The id tie-breaker follows the last key's direction so one index scan,
+    # forwards or backwards, can serve the whole ORDER BY
+    descending = [key.startswith("-") for key in sort_keys]
+    descending.append(descending[-1] if descending else False)
+    columns = [SORTABLE_COLUMNS[name] for name in names] + [Book.id]
+    
+    if published_from and published_to and published_from > published_to:
+        raise ValidationError("published_from must not be after published_to")
+    filters = []
+    if genre is not None:
+        filters.append(Book.genre == genre)
+    if author is not None:
+        filters.append(Book.author == author)
+    if published_from is not None:
+        filters.append(Book.published_date >= published_from)
+    if published_to is not None:
+        filters.append(Book.published_date <= published_to)
+
+    total = total_pages = None
+    if include_total:
+        # The cached count is for the whole table, so filtered totals are always counted
+        total = book_count.get() if total_mode == "estimate" and not filters else None
+        if total is None:
+            total = await db.scalar(select(func.count()).select_from(Book).where(*filters))
+            if not filters:
+                book_count.set(total)
+        
+        total_pages = (total + items_per_page - 1) // items_per_page
     
-    total_pages = (total + items_per_page - 1) // items_per_page
-    logger.info(f"Total pages: {total_pages}")
+    query = select(*BOOK_COLUMNS).where(*filters).order_by(
+        *(column.desc() if desc else column for column, desc in zip(columns, descending))
+    )
+    if cursor is not None:
+        # Keyset mode: seek past the last row of the previous page. Each
+        # phase picks up where the previous one ran out of rows
+        values = decode_cursor(cursor, sort_keys + ["id"])
+        page = None
+        rows = []
+        for condition in keyset_phases(columns, values, descending):
+            rows += (await db.execute(query.where(condition).limit(items_per_page + 1 - len(rows)))).all()
+            if len(rows) > items_per_page:
+                break
+    else:
+        skip = (page - 1) * items_per_page
+        rows = (await db.execute(query.offset(skip).limit(items_per_page + 1))).all()
     
-    skip = (page - 1) * items_per_page
-    logger.info(f"Skipping {skip} items")
+    next_cursor = None
+    if len(rows) > items_per_page:
+        rows = rows[:items_per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            sort_keys + ["id"],
+            [getattr(last, name) for name in names] + [last.id]
+        )
     
-    books = db.query(Book).offset(skip).limit(items_per_page).all()
-    logger.info(f"Retrieved {len(books)} books")
+    # Checked first so a disabled level costs nothing, not even building the fields
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Listed books", extra={
+            "total": total, "page": page, "cursor": cursor is not None,
+            "filters": len(filters), "returned": len(rows)
+        })
     
-    result = {
+    return {
         "total": total,
-        "items": books,
+        "items": book_rows_to_dicts(rows),
         "page": page,
-        "pages": total_pages
+        "pages": total_pages,
+        "next_cursor": next_cursor
     }
-    logger.info(f"Result length: {len(result['items'])}")
-    return result
 
 @router.put("/{book_id}", 
     response_model=BookSchema,
     summary="Update a book",
-    description="Update an existing book's details")
+    description="Update an existing book's details. Send the book's ETag in If-Match "
+                "to fail with 412 instead of overwriting someone else's change")
 async def update_book(
     book_id: int,
     book: BookCreate,
+    response: Response,
+    if_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
+    db_book = await db.get(Book, book_id)
     if db_book is None:
         raise NotFoundError("Book")
+    check_if_match(if_match, book_etag(db_book))
     
-    for key, value in book.model_dump().items():
+    values = book.model_dump()
+    await adjust_facets(db, facet_deltas(removed=[db_book], added=[values]))
+    for key, value in values.items():
         setattr(db_book, key, value)
     
-    db.commit()
-    db.refresh(db_book)
+    try:
+        await db.commit()
+    except StaleDataError:
+        # Another writer committed between our read and this UPDATE
+        await db.rollback()
+        raise PreconditionFailedError("Book was modified concurrently")
+    set_validators(response, book_etag(db_book), db_book.updated_at)
     
     # Send update event
     await send_book_update("updated", db_book.id, db_book.__dict__)
@@ -150,18 +615,26 @@ async def update_book(
 
 @router.delete("/{book_id}",
     summary="Delete a book",
-    description="Delete a book from the database")
+    description="Delete a book from the database. Honors If-Match like update")
 async def delete_book(
     book_id: int,
+    if_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
+    db_book = await db.get(Book, book_id)
     if db_book is None:
         raise NotFoundError("Book")
+    check_if_match(if_match, book_etag(db_book))
     
-    db.delete(db_book)
-    db.commit()
+    await db.delete(db_book)
+    await adjust_facets(db, facet_deltas(removed=[db_book]))
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise PreconditionFailedError("Book was modified concurrently")
+    book_count.adjust(-1)
     
     # Send update event
     await send_book_update("deleted", book_id)
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db.database import get_db
+from app.db.database import get_read_db
+from app.core.events import get_stream_stats
+from app.api.v1.endpoints.auth import user_cache
+from app.core.response_cache import response_cache
 
 router = APIRouter()
 
@@ -18,10 +21,10 @@ async def health_check():
 @router.get("/health/database",
    summary="Check database health",
    description="Check if the database connection is working properly")
-async def database_health_check(db: Session = Depends(get_db)):
+async def database_health_check(db: AsyncSession = Depends(get_read_db)):
    try:
        # Execute a simple query to check database connection
-       db.execute(text("SELECT 1")).scalar()
+       (await db.execute(text("SELECT 1"))).scalar()
        return {
            "status": "healthy",
            "service": "database",
@@ -32,4 +35,28 @@ async def database_health_check(db: Session = Depends(get_db)):
            "status": "unhealthy", 
            "service": "database",
            "details": str(e)
-       }
\ No newline at end of file
+       }
+
+@router.get("/health/stream",
+   summary="Check real-time stream health",
+   description="Connected SSE clients, queue depths and dropped events for this worker")
+async def stream_health_check():
+   return {
+       "status": "healthy",
+       "service": "stream",
+       "details": get_stream_stats()
+   }
+
+
+@router.get("/health/cache",
+   summary="Check cache health",
+   description="Size, memory, hit and eviction counters of this worker's in-process caches")
+async def cache_health_check():
+   return {
+       "status": "healthy",
+       "service": "cache",
+       "details": {
+           "auth": user_cache.stats(),
+           "responses": response_cache.stats()
+       }
+   }
@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.api.v1.endpoints.auth import user_cache
+from app.core.events import get_stream_stats
+from app.core.metrics import collect_all, registry, render
+from app.core.ratelimit import rate_limiter
+from app.core.response_cache import response_cache
+from app.core.security import password_hash_pool
+
+router = APIRouter()
+
+sse_clients = registry.gauge("sse_clients", "Connected SSE clients")
+sse_queue_depth = registry.gauge("sse_queue_depth", "Events waiting in SSE client buffers")
+sse_queue_depth_max = registry.gauge(
+    "sse_queue_depth_max", "Deepest single SSE client buffer", mode="max"
+)
+sse_events_lost_total = registry.counter(
+    "sse_events_lost_total", "Events a lagging SSE client never received", ("reason",)
+)
+password_hash_pending = registry.gauge(
+    "password_hash_pending", "Hashes running or queued for a bcrypt thread"
+)
+password_hash_rejected_total = registry.counter(
+    "password_hash_rejected_total", "Logins and registrations refused with 503 because the bcrypt queue was full"
+)
+cache_entries = registry.gauge("cache_entries", "Entries held by an in-process cache", ("cache",))
+cache_lookups_total = registry.counter(
+    "cache_lookups_total", "Cache lookups by outcome", ("cache", "result")
+)
+
+requests_rejected_total = registry.counter(
+    "requests_rejected_total", "Requests refused before routing: 429 over a rate limit, 503 at capacity",
+    ("reason",)
+)
+
+def collect_admission_metrics() -> None:
+    if rate_limiter is not None:
+        requests_rejected_total.set(rate_limiter.limited, "rate_limited")
+        requests_rejected_total.set(rate_limiter.shed, "at_capacity")
+
+def collect_stream_metrics() -> None:
+    stats = get_stream_stats()
+    sse_clients.set(stats["subscribers"])
+    sse_queue_depth.set(stats["queue_depth_total"])
+    sse_queue_depth_max.set(stats["queue_depth_max"])
+    for reason in ("dropped", "coalesced", "evicted"):
+        sse_events_lost_total.set(stats[reason], reason)
+
+def collect_auth_metrics() -> None:
+    password_hash_pending.set(password_hash_pool.pending)
+    password_hash_rejected_total.set(password_hash_pool.rejected)
+
+def collect_cache_metrics() -> None:
+    for name, cache in (("auth", user_cache), ("responses", response_cache)):
+        cache_entries.set(len(cache), name)
+        cache_lookups_total.set(cache.hits, name, "hit")
+        cache_lookups_total.set(cache.misses, name, "miss")
+
+registry.add_collector(collect_admission_metrics)
+registry.add_collector(collect_stream_metrics)
+registry.add_collector(collect_auth_metrics)
+registry.add_collector(collect_cache_metrics)
+
+@router.get("/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics",
+    description="Request latency, SQL, SSE, bcrypt and cache metrics in the Prometheus "
+                "text format, summed over all workers when METRICS_MULTIPROCESS_DIR is set")
+async def metrics():
+    return PlainTextResponse(render(collect_all()), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,61 @@
+"""Validators and precondition checks for HTTP conditional requests (RFC 9110)."""
+import hashlib
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response
+from app.core.errors import PreconditionFailedError
+
+def book_etag(book) -> str:
+    """Strong ETag for one book; the version changes on every update."""
+    return f'"{book.id}.{book.version}"'
+
+def collection_etag(catalog_version: int, query: str) -> str:
+    """Strong ETag for a listing: any write to books bumps the catalog version,
+    and the query string tells apart pages, filters and sort orders."""
+    digest = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    return f'"c{catalog_version}-{digest}"'
+
+def http_date(value: datetime) -> str:
+    # Stored timestamps are naive UTC
+    return format_datetime(value.replace(microsecond=0, tzinfo=UTC), usegmt=True)
+
+def _parse_tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """True if If-None-Match matches, i.e. the client's copy is current.
+    Uses weak comparison, as the spec requires for this header."""
+    if not if_none_match:
+        return False
+    tags = _parse_tags(if_none_match)
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime | None) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(UTC).replace(tzinfo=None)
+    return last_modified.replace(microsecond=0) <= since
+
+def check_if_match(if_match: str | None, etag: str) -> None:
+    """Enforce If-Match with strong comparison: weak tags never match."""
+    if if_match is None:
+        return
+    tags = _parse_tags(if_match)
+    if "*" not in tags and etag not in tags:
+        raise PreconditionFailedError("Book has been modified since it was fetched")
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    """A bodiless 304 carrying the same validators a 200 would."""
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+def set_validators(response: Response, etag: str, last_modified: datetime | None = None) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
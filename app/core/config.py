@@ -17,10 +17,97 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAYS: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_DAYS", "7"))
+    # Verified token -> user cache; bounds how long a user change takes to apply
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+    # bcrypt runs on this many threads; further logins wait up to the queue limit, then get 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_LIMIT: int = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///app/db/books.db")
     PORT: int = int(os.getenv("PORT", "8000"))
+    # SQLite tuning, applied to every connection; an empty value leaves SQLite's default
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: str = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+    SQLITE_CACHE_SIZE: str = os.getenv("SQLITE_CACHE_SIZE", "-65536")  # negative = KiB, so 64 MiB
+    SQLITE_MMAP_SIZE: str = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    # Read-only connections per worker for GETs; writes share one serialized connection
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+    # Create and migrate the schema when each worker starts. Turn off when a
+    # deploy step runs "python -m app.db.migrations" once beforehand
+    MIGRATE_ON_STARTUP: bool = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+    # Seconds a cached book count is trusted before it is re-read from the database
+    BOOK_COUNT_RECONCILE_SECONDS: float = float(os.getenv("BOOK_COUNT_RECONCILE_SECONDS", "30"))
+
+    # Serialized book and list-page responses kept per worker, bounded by count and bytes
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "10000"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+
+    # Most IDs one GET /books/batch request may ask for
+    BATCH_GET_MAX_IDS: int = int(os.getenv("BATCH_GET_MAX_IDS", "100"))
+
+    # Rows inserted per transaction by the bulk import endpoint
+    BULK_INSERT_CHUNK_SIZE: int = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+
+    # Change log behind GET /books/changes: entries older than the retention
+    # are compacted away, and readers that fell further behind must resync
+    CHANGE_LOG_RETENTION_SECONDS: float = float(os.getenv("CHANGE_LOG_RETENTION_SECONDS", str(7 * 24 * 3600)))
+    CHANGE_LOG_COMPACT_INTERVAL_SECONDS: float = float(os.getenv("CHANGE_LOG_COMPACT_INTERVAL_SECONDS", "3600"))
+    CHANGE_FEED_MAX_LIMIT: int = int(os.getenv("CHANGE_FEED_MAX_LIMIT", "1000"))
+
+    # Real-time events: "sqlite" (shared by all workers) or "memory" (single worker only)
+    EVENT_BACKEND: str = os.getenv("EVENT_BACKEND", "sqlite")
+    EVENT_LOG_PATH: str = os.getenv("EVENT_LOG_PATH", "app/db/events.db")
+    EVENT_POLL_INTERVAL: float = float(os.getenv("EVENT_POLL_INTERVAL", "0.05"))
+    EVENT_LOG_RETENTION_SECONDS: float = float(os.getenv("EVENT_LOG_RETENTION_SECONDS", "300"))
+
+    # Per-client SSE buffer; overflow policy is drop_oldest, coalesce or disconnect
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", "1000"))
+    SSE_OVERFLOW_POLICY: str = os.getenv("SSE_OVERFLOW_POLICY", "drop_oldest")
+    # Recent events kept per worker so reconnecting clients can resume from Last-Event-ID
+    SSE_REPLAY_SIZE: int = int(os.getenv("SSE_REPLAY_SIZE", "10000"))
+
+    # Rate limits, as "requests per second:burst", per token subject or client IP.
+    # Routes listed in RATE_LIMIT_ROUTES ("METHOD /path=rate:burst, ...") get
+    # their own budget. Buckets are per worker ("memory") or shared ("sqlite").
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_DEFAULT: str = os.getenv("RATE_LIMIT_DEFAULT", "20:40")
+    RATE_LIMIT_ROUTES: str = os.getenv(
+        "RATE_LIMIT_ROUTES",
+        "POST /api/v1/auth/login=0.5:5, POST /api/v1/auth/register=0.2:3, "
+        "POST /api/v1/books/bulk=0.1:2, GET /api/v1/books/export=0.1:2",
+    )
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_DB_PATH: str = os.getenv("RATE_LIMIT_DB_PATH", "app/db/ratelimit.db")
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+    # Proxies whose X-Forwarded-For names the client: addresses or networks,
+    # or "*" for any peer when only the platform's router can reach the app
+    RATE_LIMIT_TRUSTED_PROXIES: str = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+    RATE_LIMIT_EXEMPT_PATHS: str = os.getenv(
+        "RATE_LIMIT_EXEMPT_PATHS", "/api/v1/health,/metrics,/api/v1/books/stream"
+    )
+    # Requests one worker handles at once before answering 503; 0 for no limit
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "256"))
+
+    # Logging: records are queued and written by a background thread. Format is
+    # json or text; sampling and rate limits are "logger=value" lists
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
+    LOG_RATE_LIMITS: str = os.getenv("LOG_RATE_LIMITS", "")
+
+    # Prometheus-style /metrics; with several workers, point every worker at
+    # the same directory so any of them can report the totals
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_MULTIPROCESS_DIR: str = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+    METRICS_FLUSH_SECONDS: float = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
 
     class Config:
         case_sensitive = True
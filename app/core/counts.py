@@ -0,0 +1,42 @@
+import threading
+import time
+from app.core.config import settings
+
+class RowCountCache:
+    """Row count maintained incrementally by the write handlers.
+
+    Each worker keeps its own copy, so the value is re-read from the database
+    once it is older than ``reconcile_seconds``. That bounds the drift caused
+    by writes handled in other workers.
+    """
+
+    def __init__(self, reconcile_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+        self._value: int | None = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> int | None:
+        """Return the cached count, or None if it must be reconciled."""
+        with self._lock:
+            if self._value is None:
+                return None
+            if time.monotonic() - self._synced_at > self.reconcile_seconds:
+                return None
+            return self._value
+
+    def set(self, value: int) -> None:
+        with self._lock:
+            self._value = value
+            self._synced_at = time.monotonic()
+
+    def adjust(self, delta: int) -> None:
+        with self._lock:
+            if self._value is not None:
+                self._value = max(self._value + delta, 0)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+
+book_count = RowCountCache(settings.BOOK_COUNT_RECONCILE_SECONDS)
@@ -21,6 +21,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 "path": request.url.path
             }
         },
+        headers=getattr(exc, "headers", None),
     )
 
 # Custom exceptions
@@ -34,4 +35,16 @@ class ValidationError(BookAPIException):
 
 class NotFoundError(BookAPIException):
     def __init__(self, resource: str):
-        super().__init__(404, f"{resource} not found")
\ No newline at end of file
+        super().__init__(404, f"{resource} not found")
+
+class PreconditionFailedError(BookAPIException):
+    def __init__(self, detail: str):
+        super().__init__(412, detail)
+
+class GoneError(BookAPIException):
+    def __init__(self, detail: str):
+        super().__init__(410, detail)
+
+class ServiceBusyError(BookAPIException):
+    def __init__(self, detail: str, retry_after: int = 1):
+        super().__init__(503, detail, headers={"Retry-After": str(retry_after)})
\ No newline at end of file
@@ -1,26 +1,356 @@
-from asyncio import Queue
-from typing import Dict
-from fastapi import BackgroundTasks
+import abc
+import asyncio
+import itertools
 import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Dict, NamedTuple
+from fastapi import BackgroundTasks
+from fastapi.encoders import jsonable_encoder
 from datetime import datetime, UTC
+import aiosqlite
+from sse_starlette.sse import ServerSentEvent
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+class BookEvent(NamedTuple):
+    """A book event encoded once as a complete SSE frame.
+
+    The same immutable frame is shared by every subscriber queue and the
+    replay log, so a broadcast costs one serialization however many clients
+    are connected.
+    """
+    id: int
+    event: str
+    book_id: int | None
+    frame: bytes
+
+    @classmethod
+    def encode(cls, message: dict) -> "BookEvent":
+        frame = ServerSentEvent(
+            json.dumps(message), id=message["id"], event=message["event"]
+        ).encode()
+        return cls(message["id"], message["event"], message["book_id"], frame)
+
+    def decode(self) -> dict:
+        """Parse the message back out of the frame (tests and tooling)."""
+        data = self.frame.split(b"data: ", 1)[1].split(b"\r\n", 1)[0]
+        return json.loads(data)
+
+class Subscriber:
+    """Bounded buffer of events waiting to be sent to one SSE client.
+
+    ``offer`` never blocks: when the buffer is full the overflow policy
+    decides what gives way, so a slow client can't hold up a broadcast.
+    """
+
+    def __init__(self, client_id: str, maxsize: int, policy: str):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown SSE overflow policy: {policy}")
+        self.client_id = client_id
+        self.maxsize = maxsize
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0
+        self._pending: OrderedDict = OrderedDict()
+        self._keys = itertools.count()
+        self._ready = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def offer(self, message: BookEvent) -> bool:
+        """Queue a message; returns False if the subscriber was disconnected."""
+        if self.closed:
+            return False
+
+        key = next(self._keys)
+        if self.policy == "coalesce" and message.book_id is not None:
+            key = ("book", message.book_id)
+            if self._pending.pop(key, None) is not None:
+                # Only the latest state of a book matters to a lagging client
+                self.dropped += 1
+                stream_stats["coalesced"] += 1
 
-# Global event queue for book updates
-book_updates: Dict[str, Queue] = {}
+        if len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            if self.policy == "disconnect":
+                stream_stats["evicted"] += 1
+                self.close()
+                return False
+            self._pending.popitem(last=False)
+            stream_stats["dropped"] += 1
 
-async def get_book_update_queue(client_id: str) -> Queue:
+        self._pending[key] = message
+        self._ready.set()
+        return True
+
+    async def get(self) -> BookEvent | None:
+        """Wait for the next message; None once the subscriber is closed."""
+        while not self._pending:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        if self.closed:
+            return None
+        return self._pending.popitem(last=False)[1]
+
+    def close(self) -> None:
+        self.closed = True
+        self._pending.clear()
+        self._ready.set()
+
+# Connected SSE clients of this worker
+book_updates: Dict[str, Subscriber] = {}
+
+# Cumulative counters since the worker started
+stream_stats = {"dropped": 0, "coalesced": 0, "evicted": 0}
+
+# Most recent events delivered in this worker, oldest first, for Last-Event-ID replay
+recent_events: deque = deque(maxlen=settings.SSE_REPLAY_SIZE)
+
+async def get_book_update_queue(client_id: str) -> Subscriber:
     if client_id not in book_updates:
-        book_updates[client_id] = Queue()
+        book_updates[client_id] = Subscriber(
+            client_id, settings.SSE_QUEUE_SIZE, settings.SSE_OVERFLOW_POLICY
+        )
     return book_updates[client_id]
 
 async def remove_client(client_id: str, background_tasks: BackgroundTasks):
     if client_id in book_updates:
-        del book_updates[client_id]
+        book_updates.pop(client_id).close()
+
+async def deliver_book_update(message: dict):
+    """Fan a message out to the subscribers connected to this worker."""
+    event = BookEvent.encode(message)
+    recent_events.append(event)
+    for subscriber in list(book_updates.values()):
+        subscriber.offer(event)
+
+def get_events_since(last_event_id: int) -> list[BookEvent] | None:
+    """Events after ``last_event_id`` from this worker's replay log, or None if
+    the log can't cover the gap (the ID is older than the retained window or
+    unknown to this worker)."""
+    if last_event_id == broadcast_backend.head:
+        # The client already has the newest event: nothing to replay, even
+        # from a worker that has delivered nothing since it started
+        return []
+    if not recent_events:
+        return None
+    if last_event_id > recent_events[-1].id or last_event_id < recent_events[0].id - 1:
+        return None
+    return [event for event in recent_events if event.id > last_event_id]
+
+async def replay_events_since(last_event_id: int) -> list[BookEvent] | None:
+    """Events after ``last_event_id``, from this worker's replay log or else
+    the backend's shared log; None means the client must resync."""
+    missed = get_events_since(last_event_id)
+    if missed is None:
+        missed = await broadcast_backend.events_since(last_event_id)
+    return missed
+
+def get_stream_stats() -> dict:
+    depths = [subscriber.depth for subscriber in book_updates.values()]
+    return {
+        "subscribers": len(depths),
+        "queue_depth_total": sum(depths),
+        "queue_depth_max": max(depths, default=0),
+        "queue_size": settings.SSE_QUEUE_SIZE,
+        "overflow_policy": settings.SSE_OVERFLOW_POLICY,
+        "replay_log_size": len(recent_events),
+        **stream_stats,
+    }
+
+class BroadcastBackend(abc.ABC):
+    """Carries book events to every worker, which then delivers them locally."""
+
+    def __init__(self, deliver=deliver_book_update):
+        self.deliver = deliver
+
+    @property
+    @abc.abstractmethod
+    def head(self) -> int:
+        """ID of the newest event this worker delivered, or of the newest
+        event in the log when it started."""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, message: dict) -> None:
+        """Send ``message`` to every worker, assigning its event ID."""
+
+    async def events_since(self, last_event_id: int) -> list[BookEvent] | None:
+        """Events after ``last_event_id`` from storage shared by the workers,
+        or None if it can't cover the gap."""
+        return None
+
+class InProcessBackend(BroadcastBackend):
+    """Delivers straight to this worker's subscribers (single-worker setups).
+
+    Event IDs come from a per-worker counter.
+    """
+
+    def __init__(self, deliver=deliver_book_update):
+        super().__init__(deliver)
+        self._ids = itertools.count(1)
+        self._head = 0
+
+    @property
+    def head(self) -> int:
+        return self._head
+
+    async def publish(self, message: dict) -> None:
+        self._head = next(self._ids)
+        await self.deliver({**message, "id": self._head})
+
+class SQLiteLogBackend(BroadcastBackend):
+    """Shares events between workers through an append-only SQLite log.
+
+    Every worker appends published events to the same file and tails it,
+    delivering rows newer than the last one it has seen. Events are therefore
+    delivered in log order in every worker, at most ``poll_interval`` late,
+    and the row ID serves as an event ID that is valid on every worker.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float,
+        retention_seconds: float,
+        deliver=deliver_book_update,
+    ):
+        super().__init__(deliver)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._conn: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._last_id = 0
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._conn is not None:
+                return
+            # Autocommit: each statement is its own transaction, so writers
+            # queue on busy_timeout instead of failing a read-to-write upgrade
+            conn = await aiosqlite.connect(self.path, isolation_level=None)
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA busy_timeout=5000")
+            await conn.execute(
+                "CREATE TABLE IF NOT EXISTS book_events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "created_at REAL NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+            rows = await conn.execute_fetchall("SELECT COALESCE(MAX(id), 0) FROM book_events")
+            self._last_id = rows[0][0]
+            self._conn = conn
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if self._task is not None:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+                self._task = None
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
+
+    async def publish(self, message: dict) -> None:
+        await self.start()
+        try:
+            await self._conn.execute_insert(
+                "INSERT INTO book_events (created_at, payload) VALUES (?, ?)",
+                (time.time(), json.dumps(message)),
+            )
+        except Exception:
+            # The book write itself is already committed; don't fail the request
+            logger.exception("Failed to publish book event")
+
+    @property
+    def head(self) -> int:
+        return self._last_id
+
+    async def events_since(self, last_event_id: int) -> list[BookEvent] | None:
+        """Replay from the retained log, which outlives any one worker."""
+        await self.start()
+        # One statement, so a concurrent prune can't split the rows from the
+        # bounds. The log's head is the last ID ever assigned, which this
+        # worker's poller may not have reached yet and pruning never lowers
+        rows = await self._conn.execute_fetchall(
+            "SELECT bounds.oldest, bounds.head, book_events.id, book_events.payload FROM ("
+            "SELECT (SELECT MIN(id) FROM book_events) AS oldest, "
+            "(SELECT seq FROM sqlite_sequence WHERE name = 'book_events') AS head"
+            ") AS bounds LEFT JOIN book_events ON book_events.id > ? ORDER BY book_events.id",
+            (last_event_id,),
+        )
+        oldest, head = rows[0][0], rows[0][1] or 0
+        rows = [(row_id, payload) for _, _, row_id, payload in rows if row_id is not None]
+        if not rows:
+            # Nothing after it: fine if it is the head, else those rows were pruned
+            return [] if last_event_id == head else None
+        if oldest > last_event_id + 1:
+            return None
+        return [BookEvent.encode({**json.loads(payload), "id": row_id}) for row_id, payload in rows]
+
+    async def _poll(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            try:
+                # Fetch in one call so a publish cannot run while the read is open
+                rows = await self._conn.execute_fetchall(
+                    "SELECT id, payload FROM book_events WHERE id > ? ORDER BY id",
+                    (self._last_id,),
+                )
+                for row_id, payload in rows:
+                    self._last_id = row_id
+                    await self.deliver({**json.loads(payload), "id": row_id})
+
+                if time.monotonic() - last_prune > self.retention_seconds:
+                    last_prune = time.monotonic()
+                    await self._conn.execute(
+                        "DELETE FROM book_events WHERE created_at < ?",
+                        (time.time() - self.retention_seconds,),
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to read the shared book event log")
+            await asyncio.sleep(self.poll_interval)
+
+def create_broadcast_backend() -> BroadcastBackend:
+    if settings.EVENT_BACKEND == "sqlite":
+        return SQLiteLogBackend(
+            settings.EVENT_LOG_PATH,
+            settings.EVENT_POLL_INTERVAL,
+            settings.EVENT_LOG_RETENTION_SECONDS,
+        )
+    if settings.EVENT_BACKEND == "memory":
+        return InProcessBackend()
+    raise ValueError(f"Unknown EVENT_BACKEND: {settings.EVENT_BACKEND}")
+
+broadcast_backend = create_broadcast_backend()
 
 async def send_book_update(event_type: str, book_id: int, book_data: dict = None):
     if book_data:
         # Remove SQLAlchemy state from the dictionary
-        cleaned_data = {k: v for k, v in book_data.items() 
-                       if not k.startswith('_') and k != 'metadata'}
+        cleaned_data = jsonable_encoder({k: v for k, v in book_data.items() 
+                       if not k.startswith('_') and k != 'metadata'})
     else:
         cleaned_data = None
 
@@ -31,8 +361,4 @@ async def send_book_update(event_type: str, book_id: int, book_data: dict = None
         "timestamp": datetime.now(UTC).isoformat()
     }
     
-    for queue in book_updates.values():
-        try:
-            await queue.put(message)
-        except Exception:
-            continue
\ No newline at end of file
+    await broadcast_backend.publish(message)
@@ -0,0 +1,235 @@
+"""Structured, non-blocking logging.
+
+Handlers on the request path only put records on a bounded queue. A
+background thread formats them (as JSON by default) and writes them out, so
+a slow terminal or log collector never stalls the event loop. If the queue
+is full, records are dropped and counted instead of blocking.
+
+Every record carries the ``request_id`` of the request that logged it.
+Fields passed with ``extra=`` become top-level JSON keys.
+
+Noisy loggers can be thinned by name. ``LOG_SAMPLING`` keeps a fraction of
+the records logged on them, and ``LOG_RATE_LIMITS`` caps records per second.
+Both are comma-separated ``name=value`` lists. Warnings and errors are never
+sampled out.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from app.core.config import settings
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through extra=.
+# uvicorn adds an ANSI-colored copy of its messages, which has no place in JSON.
+_STANDARD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {
+    "message", "asctime", "request_id", "color_message"
+}
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request's ID while still in its context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep a random ``rate`` share of records below WARNING, and at most
+    ``per_second`` of them in any second.
+
+    The next record let through reports how many were rate limited before it,
+    as ``suppressed``.
+    """
+
+    def __init__(self, rate: float = 1.0, per_second: float | None = None):
+        super().__init__()
+        self.rate = rate
+        self.per_second = per_second
+        self.suppressed = 0
+        self._tokens = per_second or 0.0
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return False
+        if self.per_second is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_second, self._tokens + (now - self._refilled_at) * self.per_second)
+            self._refilled_at = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return False
+            self._tokens -= 1
+            if self.suppressed:
+                record.suppressed = self.suppressed
+                self.suppressed = 0
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking
+    or reporting an error."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback in the caller's thread, while the
+        # objects they refer to are still as logged. Unlike the base class,
+        # leave formatting to the output handler so extra fields survive.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def parse_logger_settings(value: str) -> dict[str, float]:
+    """``"uvicorn.access=0.1, app=5"`` -> ``{"uvicorn.access": 0.1, "app": 5.0}``"""
+    result = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, number = item.partition("=")
+        result[name.strip()] = float(number)
+    return result
+
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+class RequestIdMiddleware:
+    """Tag each request with an ID for its log records and echo it back.
+
+    A well-formed ``X-Request-ID`` from the client or a proxy is reused, so one
+    ID can follow a request across services; otherwise a new one is made.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((value for name, value in scope["headers"] if name == b"x-request-id"), b"")
+        rid = incoming.decode("latin-1")
+        if not _REQUEST_ID_PATTERN.fullmatch(rid):
+            rid = uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", rid.encode())]
+            await send(message)
+
+        token = request_id.set(rid)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
+
+queue_handler: DroppingQueueHandler | None = None
+_listener: QueueListener | None = None
+_stream = None
+
+def configure_logging(stream=None) -> None:
+    """Route the root logger, and uvicorn's, through the queue to ``stream``
+    (stderr by default).
+
+    Safe to call more than once: a handler installed by an earlier call is
+    replaced, and handlers installed by others (pytest, say) are left alone.
+    """
+    global queue_handler, _listener, _stream
+    stop_logging()
+    _stream = stream
+
+    output = logging.StreamHandler(stream)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    if queue_handler is not None:
+        root.removeHandler(queue_handler)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    # uvicorn installs its own synchronous handlers; send its records through ours
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    rates = parse_logger_settings(settings.LOG_SAMPLING)
+    limits = parse_logger_settings(settings.LOG_RATE_LIMITS)
+    for name in rates.keys() | limits.keys():
+        target = logging.getLogger(name)
+        for existing in [f for f in target.filters if isinstance(f, SamplingFilter)]:
+            target.removeFilter(existing)
+        target.addFilter(SamplingFilter(rates.get(name, 1.0), limits.get(name)))
+
+    queue_handler = handler
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Write out whatever is still queued; called on shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _restart_after_fork() -> None:
+    # A forked child (a gunicorn --preload worker) inherits the queue but not
+    # the thread draining it, and the queue's lock may have been mid-use
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging(_stream)
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
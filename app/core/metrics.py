@@ -0,0 +1,390 @@
+"""Prometheus-style metrics, kept in memory per worker.
+
+Updating a metric is a dict lookup and an addition under a lock, so the
+request path pays well under a microsecond per update. Values that already
+live elsewhere, such as SSE queue depths or cache counters, are copied in by
+collectors that run only when metrics are scraped or flushed.
+
+With several workers, set ``METRICS_MULTIPROCESS_DIR``. Each worker then
+writes a snapshot of its metrics to ``<dir>/<pid>.json`` every
+``METRICS_FLUSH_SECONDS``. A scrape, whichever worker serves it, merges every
+recent snapshot. Counters, histograms and most gauges are summed; gauges
+created with ``mode="max"`` keep the largest value.
+"""
+import asyncio
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float | list] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [
+                [list(labels), list(value) if isinstance(value, list) else value]
+                for labels, value in self._values.items()
+            ]
+        return {"type": self.type, "help": self.help, "labelnames": list(self.labelnames), "samples": samples}
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Mirror a cumulative count kept elsewhere (collectors only)."""
+        with self._lock:
+            self._values[labels] = value
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), mode: str = "sum"):
+        super().__init__(name, help, labelnames)
+        self.mode = mode
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "mode": self.mode}
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets.
+
+    Each label set stores per-bucket counts (not cumulative, the last one
+    being +Inf) followed by the sum of observations.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (), mode: str = "sum") -> Gauge:
+        return self.register(Gauge(name, help, labelnames, mode))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before every scrape or flush to refresh mirrored values."""
+        self.collectors.append(collector)
+
+    def collect(self) -> dict:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def clear(self) -> None:
+        for metric in self.metrics.values():
+            metric.clear()
+
+registry = MetricsRegistry()
+
+# Request-level metrics, recorded by MetricsMiddleware
+http_requests_total = registry.counter(
+    "http_requests_total", "Requests handled, by route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte "
+    "of its response (event streams excluded)", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled, including open event streams", ("method",)
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements executed while handling one request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+db_seconds_per_request = registry.histogram(
+    "db_seconds_per_request", "Time spent in SQL statements while handling one request", ("method", "route")
+)
+
+# Every statement on every engine, recorded by the engine event hooks
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Execution time of a single SQL statement"
+)
+
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Time bcrypt spent on one hash or verification", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+password_hash_wait_seconds = registry.histogram(
+    "password_hash_wait_seconds", "Time a hash waited for a free bcrypt thread", ("operation",)
+)
+
+# [statement count, seconds] for the request being handled, if any
+request_db_stats: ContextVar[list | None] = ContextVar("request_db_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time, so one slot per connection will do
+    conn.info["metrics_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("metrics_started")
+    db_query_duration_seconds.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+def instrument_engines() -> None:
+    """Time the statements of every engine, including ones created later."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def _route_template(scope) -> str:
+    """The matched route as a template such as ``/api/v1/books/{book_id}``.
+
+    Templates, not raw paths, keep the label set bounded. Depending on the
+    FastAPI version, the route's own path may lack its router's prefix; the
+    prefix is then whatever precedes the route's part of the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    return path[: len(path) - len(concrete)] + template if path.endswith(concrete) else template
+
+class MetricsMiddleware:
+    """Times each request and counts its SQL, as metrics and as a
+    ``Server-Timing`` header the browser's network panel can show.
+
+    A plain ASGI middleware, so streaming responses pass straight through.
+    Event streams last as long as their client stays connected, so they are
+    counted but kept out of the latency histogram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = [0, 0.0]
+        token = request_db_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_with_timing(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = message.setdefault("headers", [])
+                streaming = any(
+                    name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in headers
+                )
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                message["headers"] = [*headers, (
+                    b"server-timing",
+                    f'db;dur={stats[1] * 1000:.1f};desc="{stats[0]} queries", '
+                    f"app;dur={elapsed_ms:.1f}".encode(),
+                )]
+            await send(message)
+
+        http_requests_in_flight.inc(1, method)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(1, method)
+            request_db_stats.reset(token)
+            route = _route_template(scope)
+            http_requests_total.inc(1, method, route, str(status))
+            if not streaming:
+                http_request_duration_seconds.observe(elapsed, method, route)
+                db_queries_per_request.observe(stats[0], method, route)
+                db_seconds_per_request.observe(stats[1], method, route)
+
+class SnapshotStore:
+    """Per-worker snapshot files that together make up the metrics of all workers."""
+
+    def __init__(self, directory: str, flush_seconds: float):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def write(self, snapshot: dict) -> None:
+        # Replace atomically so a concurrent scrape never reads half a file
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+    def read_all(self) -> list[dict]:
+        """Snapshots of live workers; files a worker stopped refreshing are removed."""
+        stale_before = time.time() - max(3 * self.flush_seconds, 30)
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+snapshot_store = (
+    SnapshotStore(settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_FLUSH_SECONDS)
+    if settings.METRICS_MULTIPROCESS_DIR else None
+)
+
+def collect_all() -> dict:
+    """This worker's metrics, merged with every other worker's if enabled."""
+    snapshot = registry.collect()
+    if snapshot_store is None:
+        return snapshot
+    snapshot_store.write(snapshot)
+    return merge_snapshots(snapshot_store.read_all())
+
+async def flush_periodically() -> None:
+    """Keep this worker's snapshot file fresh for scrapes served by others."""
+    while True:
+        try:
+            snapshot_store.write(registry.collect())
+        except OSError:
+            logger.exception("Failed to write metrics snapshot")
+        await asyncio.sleep(snapshot_store.flush_seconds)
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            samples = target["samples"]
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = value
+                elif isinstance(value, list):
+                    samples[key] = [a + b for a, b in zip(current, value)]
+                elif metric.get("mode") == "max":
+                    samples[key] = max(current, value)
+                else:
+                    samples[key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(labels), value] for labels, value in metric["samples"].items()]
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def render(snapshot: dict) -> str:
+    """Prometheus text exposition format, version 0.0.4."""
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], float("inf")], value[:-1]):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_number(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Sequence
+from sqlalchemy import Date, and_, tuple_
+from app.core.errors import ValidationError
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def encode_cursor(keys: Sequence[str], values: Sequence[Any]) -> str:
+    payload = json.dumps({"k": list(keys), "v": list(values)}, separators=(",", ":"), default=_encode_value)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> list[Any]:
+    """Decode an opaque cursor, checking it was issued for the same sort keys."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_keys, values = payload["k"], payload["v"]
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError("Invalid cursor")
+
+    if cursor_keys != list(keys) or not isinstance(values, list) or len(values) != len(keys):
+        raise ValidationError("Cursor does not match the requested sort order")
+    # Anything else would reach the database as a bind parameter
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise ValidationError("Invalid cursor")
+    return values
+
+def _bind_value(column: Any, value: Any) -> Any:
+    """Restore a JSON cursor value to the Python type its column binds."""
+    if value is not None and isinstance(column.type, Date):
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid cursor")
+    return value
+
+def keyset_phases(columns: Sequence[Any], values: Sequence[Any], descending: Sequence[bool] | None = None) -> list:
+    """Build WHERE clauses selecting rows strictly after ``values`` in
+    ``columns`` order, ascending unless flagged in ``descending``.
+
+    The rows come back as phases: consecutive ranges in sort order, each of
+    which SQLite can answer with an index seek. Run them in order until the
+    page is full. SQLite sorts NULLs first ascending and last descending.
+
+    When every column sorts the same way and the cursor holds no NULLs, the
+    first phase is a single row-value comparison. Descending, the rows whose
+    first column is NULL follow it as a second phase.
+    """
+    descending = descending or [False] * len(columns)
+    values = [_bind_value(column, value) for column, value in zip(columns, values)]
+    if None not in values and len(set(descending)) == 1:
+        if not descending[0]:
+            return [tuple_(*columns) > tuple_(*values)]
+        # A NULL after the first column would fail the comparison although
+        # the row sorts after the cursor, so only non-nullable ones qualify
+        if not any(_nullable(column) for column in columns[1:]):
+            return [tuple_(*columns) < tuple_(*values)] + _null_tail(columns[0])
+    return _phases(columns, values, descending)
+
+def _nullable(column: Any) -> bool:
+    return getattr(column, "nullable", True)
+
+def _null_tail(column: Any) -> list:
+    return [column.is_(None)] if _nullable(column) else []
+
+def _phases(columns: Sequence[Any], values: Sequence[Any], descending: Sequence[bool]) -> list:
+    """Rows with the cursor's first value and later columns past it come
+    first, then the rest of the first column's range."""
+    if not columns:
+        return []
+    column, value, desc = columns[0], values[0], descending[0]
+    same = column.is_(None) if value is None else column == value
+    phases = [and_(same, clause) for clause in _phases(columns[1:], values[1:], descending[1:])]
+    if value is None:
+        return phases + ([] if desc else [column.is_not(None)])
+    if desc:
+        return phases + [column < value] + _null_tail(column)
+    return phases + [column > value]
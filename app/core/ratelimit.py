@@ -0,0 +1,300 @@
+"""Per-client rate limits and admission control.
+
+Each client, identified by its token's ``sub`` or else by its IP address,
+draws from a token bucket. A bucket refills at ``rate`` tokens per second
+and holds at most ``burst``. Expensive routes such as login get their own,
+smaller budgets. A client with an empty bucket gets a 429 with Retry-After.
+Independently, each worker admits at most ``MAX_CONCURRENT_REQUESTS`` at
+once and answers a 503 beyond that. Both checks run before routing, so a
+rejected request costs no database or bcrypt work.
+
+Behind a reverse proxy every request arrives from the proxy's address, so
+peers listed in ``RATE_LIMIT_TRUSTED_PROXIES`` are looked through: the
+client is the last X-Forwarded-For hop that is not itself a trusted proxy.
+
+Buckets live in worker memory by default, so with N workers a client can
+get up to N times its budget. ``RATE_LIMIT_BACKEND=sqlite`` keeps them in a
+small SQLite file shared by all workers instead. If that file cannot be
+updated quickly, requests are let through rather than stalled.
+"""
+import ipaddress
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+from jose import JWTError, jwt
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+class Budget(NamedTuple):
+    rate: float   # tokens added per second
+    burst: float  # bucket capacity
+
+def parse_budget(value: str) -> Budget:
+    """``"20:40"`` -> 20 requests per second with bursts of 40."""
+    rate, _, burst = value.partition(":")
+    return Budget(float(rate), float(burst or rate))
+
+def parse_route_budgets(value: str) -> dict[tuple[str, str], Budget]:
+    """``"POST /api/v1/auth/login=0.2:5, ..."`` -> {("POST", "/api/v1/auth/login"): Budget(0.2, 5)}"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, budget = item.partition("=")
+        method, _, path = route.strip().partition(" ")
+        budgets[(method.upper(), path.strip())] = parse_budget(budget)
+    return budgets
+
+class MemoryBuckets:
+    """Token buckets of this worker, least recently used dropped past ``max_keys``.
+
+    A dropped bucket simply starts full again, which only ever errs towards
+    letting a client through.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, budget: Budget) -> float:
+        """Spend one token; 0 if there was one, else seconds until there will be."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [budget.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(budget.burst, bucket[0] + (now - bucket[1]) * budget.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / budget.rate if budget.rate > 0 else math.inf
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+class SQLiteBuckets:
+    """Token buckets shared by every worker through one SQLite file.
+
+    Each check is a single UPSERT, which runs on the event loop: it takes
+    tens of microseconds, and ``busy_timeout`` caps any wait for another
+    worker's write. A check that fails admits the request.
+    """
+
+    TAKE = """
+        INSERT INTO rate_limits (key, tokens, updated_at, admitted) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1
+                          THEN MIN(:burst, tokens + (:now - updated_at) * :rate) - 1
+                          ELSE MIN(:burst, tokens + (:now - updated_at) * :rate) END,
+            admitted = MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now
+        RETURNING tokens, admitted
+    """
+
+    PRUNE_EVERY = 10_000
+
+    def __init__(self, path: str, busy_timeout_ms: int = 50):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._conn: sqlite3.Connection | None = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._checks = 0
+        self.failures = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use in each process: a connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Losing the last few updates in a power cut only refills some buckets
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "admitted INTEGER NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def take(self, key: str, budget: Budget) -> float:
+        params = {"key": key, "burst": budget.burst, "rate": budget.rate, "now": time.time()}
+        try:
+            with self._lock:
+                conn = self._connection()
+                tokens, admitted = conn.execute(self.TAKE, params).fetchone()
+                self._checks += 1
+                if self._checks % self.PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM rate_limits WHERE updated_at < ?", (time.time() - 3600,))
+        except sqlite3.Error:
+            self.failures += 1
+            return 0.0
+        if admitted:
+            return 0.0
+        return (1 - tokens) / budget.rate if budget.rate > 0 else math.inf
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM rate_limits")
+
+class RateLimiter:
+    def __init__(
+        self,
+        buckets,
+        default_budget: Budget,
+        route_budgets: dict[tuple[str, str], Budget],
+        max_concurrency: int,
+        exempt_paths: tuple[str, ...] = (),
+    ):
+        self.buckets = buckets
+        self.default_budget = default_budget
+        self.route_budgets = route_budgets
+        self.max_concurrency = max_concurrency
+        self.exempt_paths = exempt_paths
+        self.in_flight = 0
+        self.limited = 0
+        self.shed = 0
+
+    def check(self, method: str, path: str, client: str) -> float:
+        """Seconds the client must wait before this request is allowed, 0 if now."""
+        route = (method, path)
+        budget = self.route_budgets.get(route)
+        if budget is None:
+            return self.buckets.take(client, self.default_budget)
+        # Expensive routes draw from their own bucket, not the general one
+        return self.buckets.take(f"{method} {path} {client}", budget)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.limited = self.shed = 0
+
+async def _reject(send, status: int, message: str, path: str, retry_after: float) -> None:
+    body = json.dumps({"error": {"code": status, "message": message, "path": path}}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(min(retry_after, 3600)))).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+def parse_trusted_proxies(value: str) -> tuple[bool, list]:
+    """``"10.0.0.0/8, 127.0.0.1"`` -> networks whose X-Forwarded-For is believed.
+
+    ``"*"`` trusts any direct peer, for platforms where only their router can
+    reach the app. Hops inside the header are still only skipped when listed.
+    """
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return "*" in items, [ipaddress.ip_network(item, strict=False) for item in items if item != "*"]
+
+def _listed(address: str, networks: list) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+def client_address(scope, trusted: tuple[bool, list]) -> str:
+    """The peer's address, or behind a trusted proxy the last forwarded hop
+    that is not a trusted proxy. Hops before it were sent by the client and
+    could be made up to dodge a limit."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    trust_any, networks = trusted
+    if not (trust_any or _listed(peer, networks)):
+        return peer
+    forwarded = b",".join(value for name, value in scope["headers"] if name == b"x-forwarded-for")
+    hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _listed(hop, networks):
+            return hop
+    return hops[0] if hops else peer
+
+_trusted_proxies = parse_trusted_proxies(settings.RATE_LIMIT_TRUSTED_PROXIES)
+
+# Verified token -> subject, so identifying a client costs one JWT check per token
+_token_subjects = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+def client_key(scope) -> str:
+    """``user:<sub>`` for a request with a valid bearer token, else ``ip:<address>``.
+
+    Only verified tokens count: keying on an unverified ``sub`` would let a
+    client dodge its limit by making up a new one for every request.
+    """
+    authorization = next((value for name, value in scope["headers"] if name == b"authorization"), b"")
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = _token_subjects.get(token)
+        if subject is None:
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            except JWTError:
+                payload = {}
+            subject = payload.get("sub") or ""
+            expires_in = payload["exp"] - time.time() if "exp" in payload else None
+            _token_subjects.set(token, subject, ttl=expires_in)
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{client_address(scope, _trusted_proxies)}"
+
+class RateLimitMiddleware:
+    """Apply ``limiter`` to every HTTP request outside its exempt paths.
+
+    ``identify`` maps the ASGI scope to the client's key. It must be cheap,
+    since it runs for every request.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, identify: Callable[[dict], str]):
+        self.app = app
+        self.limiter = limiter
+        self.identify = identify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.limiter.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter
+        path = scope["path"]
+        wait = limiter.check(scope["method"], path, self.identify(scope))
+        if wait > 0:
+            limiter.limited += 1
+            await _reject(send, 429, "Too many requests", path, wait)
+            return
+        if limiter.max_concurrency and limiter.in_flight >= limiter.max_concurrency:
+            limiter.shed += 1
+            await _reject(send, 503, "Server is at capacity", path, 1)
+            return
+
+        limiter.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.in_flight -= 1
+
+def create_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        buckets = SQLiteBuckets(settings.RATE_LIMIT_DB_PATH)
+    elif settings.RATE_LIMIT_BACKEND == "memory":
+        buckets = MemoryBuckets(settings.RATE_LIMIT_MAX_CLIENTS)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+    return RateLimiter(
+        buckets,
+        parse_budget(settings.RATE_LIMIT_DEFAULT),
+        parse_route_budgets(settings.RATE_LIMIT_ROUTES),
+        settings.MAX_CONCURRENT_REQUESTS,
+        tuple(path.strip() for path in settings.RATE_LIMIT_EXEMPT_PATHS.split(",") if path.strip()),
+    )
+
+rate_limiter = create_rate_limiter() if settings.RATE_LIMIT_ENABLED else None
@@ -0,0 +1,25 @@
+"""Read-through cache of serialized listing responses.
+
+Entries hold the JSON body exactly as sent, plus its ETag, so a hit loads no
+rows and serializes nothing. Keys are ``("list", etag)`` for a listing page
+and ``("facets", etag)`` for facet counts. Both ETags embed the catalog
+version, so a write made on any worker makes old entries unreachable and they
+age out of the LRU.
+
+Single books aren't cached: looking one up by primary key costs about as much
+as checking a cached copy is still current.
+"""
+from typing import NamedTuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+response_cache = TTLCache(
+    settings.RESPONSE_CACHE_MAX_SIZE,
+    settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    sizeof=lambda entry: len(entry.body),
+)
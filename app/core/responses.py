@@ -0,0 +1,17 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+def encode_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON from pydantic-core's Rust serializer.
+
+    Handles dates, datetimes and models natively, so plain dicts of column
+    values can be encoded without validating them into models first.
+    """
+    return to_json(content)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded by ``encode_json`` instead of the stdlib json module."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -1,8 +1,15 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.core.metrics import password_hash_seconds, password_hash_wait_seconds
+
+T = TypeVar("T")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -25,4 +32,50 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+class PasswordHashPool:
+    """Bounded thread pool for bcrypt, which releases the GIL while hashing.
+
+    At most ``workers`` hashes run at once and at most ``queue_limit`` more
+    may wait; beyond that callers get a 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, func: Callable[..., T], *args, operation: str = "hash") -> T:
+        if self.pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise ServiceBusyError("Too many concurrent authentication requests")
+        self.pending += 1
+        queued_at = time.perf_counter()
+        try:
+            result, started, elapsed = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _timed, func, *args
+            )
+        finally:
+            self.pending -= 1
+        password_hash_wait_seconds.observe(started - queued_at, operation)
+        password_hash_seconds.observe(elapsed, operation)
+        return result
+
+def _timed(func: Callable[..., T], *args) -> tuple[T, float, float]:
+    # Runs on the bcrypt thread: when it started, and for how long
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter() - started
+
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password, operation="verify")
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
@@ -0,0 +1,40 @@
+"""Catalog-wide change counter used to validate cached book listings.
+
+``catalog_state`` holds a single row whose ``version`` is bumped by triggers
+on every insert, update and delete of ``books``. Any worker can read it with a
+primary-key lookup to tell whether a listing it served earlier is still
+current, without counting or scanning the books table.
+"""
+from sqlalchemy import Column, Integer, MetaData, Table, event, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.book import Book
+
+# Kept out of Base.metadata: it is created alongside the books triggers, not by create_all
+catalog_state = Table(
+    "catalog_state", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False, server_default="0"),
+)
+
+CATALOG_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS books_catalog_{operation} AFTER {operation.upper()} ON books BEGIN
+        UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+    END"""
+    for operation in ("insert", "update", "delete")
+]
+
+def ensure_catalog_version(connection: Connection) -> None:
+    """Create the counter row and the triggers that maintain it, if missing."""
+    catalog_state.create(connection, checkfirst=True)
+    connection.exec_driver_sql("INSERT OR IGNORE INTO catalog_state (id, version) VALUES (1, 0)")
+    for statement in CATALOG_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_catalog_triggers(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        ensure_catalog_version(connection)
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    return await db.scalar(select(catalog_state.c.version).where(catalog_state.c.id == 1)) or 0
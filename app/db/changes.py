@@ -0,0 +1,160 @@
+"""Durable change log of the books table, for incremental sync.
+
+Triggers append a row to ``book_changes`` on every insert, update and delete
+of ``books``, inside the writing transaction, so a change is logged exactly
+when it commits and by every writer, bulk imports included. ``seq`` comes
+from AUTOINCREMENT: it only grows and is never reused. SQLite runs one write
+transaction at a time, so rows also become visible in ``seq`` order. A
+reader that has seen everything up to some ``seq`` can therefore resume
+with ``seq > last`` and never miss a row committed later.
+
+Compaction keeps the log small:
+
+* An entry followed by a newer entry for the same book is dropped. Readers
+  get the book's current state with the newer entry, so they lose nothing.
+* Entries older than the retention period are dropped, and the highest
+  ``seq`` removed that way is recorded as ``compacted_through``. A reader
+  whose position is older than that may have missed changes and must resync.
+
+Workers compact every ``CHANGE_LOG_COMPACT_INTERVAL_SECONDS``; run it by
+hand with::
+
+    python -m app.db.changes compact
+"""
+import argparse
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, delete, event, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.core.config import settings
+from app.db.database import engine
+from app.models.book import Book
+
+logger = logging.getLogger(__name__)
+
+CHANGE_OPERATIONS = {"insert": "created", "update": "updated", "delete": "deleted"}
+
+# Kept out of Base.metadata: created alongside the triggers that fill it
+change_metadata = MetaData()
+book_changes = Table(
+    "book_changes", change_metadata,
+    Column("seq", Integer, primary_key=True),
+    Column("book_id", Integer, nullable=False),
+    Column("op", String, nullable=False),
+    Column("version", Integer),
+    # ISO 8601 UTC, written by SQLite, so it sorts and compares as text
+    Column("changed_at", String, nullable=False),
+    # Finds a book's newer entries when compacting
+    Index("ix_book_changes_book_id_seq", "book_id", "seq"),
+    # Never reuse a seq, even after the newest entries were compacted away
+    sqlite_autoincrement=True,
+)
+change_log_state = Table(
+    "change_log_state", change_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("compacted_through", Integer, nullable=False, server_default="0"),
+)
+
+SQLITE_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+CHANGE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS books_changes_{operation} AFTER {operation.upper()} ON books BEGIN
+        INSERT INTO book_changes (book_id, op, version, changed_at)
+        VALUES ({row}.id, '{op}', {row}.version, {SQLITE_NOW});
+    END"""
+    for operation, op in CHANGE_OPERATIONS.items()
+    for row in ["old" if operation == "delete" else "new"]
+]
+
+def ensure_change_log(connection: Connection) -> None:
+    """Create the log, its state row and the triggers that fill it, if missing.
+
+    A new log starts empty: changes made before it existed are not replayed.
+    """
+    change_metadata.create_all(connection, checkfirst=True)
+    connection.exec_driver_sql("INSERT OR IGNORE INTO change_log_state (id, compacted_through) VALUES (1, 0)")
+    for statement in CHANGE_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+def iso_utc(value: datetime) -> str:
+    """Format like the triggers' ``changed_at``, so the two compare as text."""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def compact_change_log(connection: Connection, retention_seconds: float) -> dict:
+    """Drop superseded entries and entries past retention; returns rows removed."""
+    newer = book_changes.alias("newer")
+    superseded = connection.execute(delete(book_changes).where(
+        select(newer.c.seq)
+        .where(newer.c.book_id == book_changes.c.book_id, newer.c.seq > book_changes.c.seq)
+        .exists()
+    )).rowcount
+
+    cutoff = iso_utc(datetime.now(UTC) - timedelta(seconds=retention_seconds))
+    through = connection.scalar(select(func.max(book_changes.c.seq)).where(book_changes.c.changed_at < cutoff))
+    expired = 0
+    if through is not None:
+        expired = connection.execute(delete(book_changes).where(book_changes.c.seq <= through)).rowcount
+        connection.execute(
+            change_log_state.update().where(change_log_state.c.id == 1)
+            .values(compacted_through=func.max(change_log_state.c.compacted_through, through))
+        )
+    return {"superseded": superseded, "expired": expired}
+
+async def get_log_bounds(db: AsyncSession) -> tuple[int, int]:
+    """``(compacted_through, head)``: positions before the first and at the
+    last entry still in the log."""
+    compacted_through = await db.scalar(
+        select(change_log_state.c.compacted_through).where(change_log_state.c.id == 1)
+    ) or 0
+    head = await db.scalar(select(func.max(book_changes.c.seq))) or 0
+    return compacted_through, max(head, compacted_through)
+
+def changes_after(since: int, limit: int, include_books: bool, book_columns: list):
+    """Keyset query for up to ``limit`` entries after ``since``, oldest first.
+
+    With ``include_books``, each row ends with the book's current columns,
+    all NULL once it is deleted.
+    """
+    query = select(book_changes).where(book_changes.c.seq > since).order_by(book_changes.c.seq).limit(limit)
+    if include_books:
+        query = query.add_columns(*book_columns).outerjoin(Book, Book.id == book_changes.c.book_id)
+    return query
+
+async def compact_periodically(async_engine: AsyncEngine) -> None:
+    while True:
+        await asyncio.sleep(settings.CHANGE_LOG_COMPACT_INTERVAL_SECONDS)
+        try:
+            async with async_engine.begin() as connection:
+                removed = await connection.run_sync(
+                    compact_change_log, settings.CHANGE_LOG_RETENTION_SECONDS
+                )
+            logger.info("Compacted the book change log", extra=removed)
+        except Exception:
+            logger.exception("Failed to compact the book change log")
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_change_log(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        ensure_change_log(connection)
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_change_log(target, connection, **kw):
+    change_metadata.drop_all(connection, checkfirst=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the book change log")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument(
+        "--retention-seconds", type=float, default=settings.CHANGE_LOG_RETENTION_SECONDS,
+        help="drop entries older than this"
+    )
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        ensure_change_log(connection)
+        removed = compact_change_log(connection, args.retention_seconds)
+        remaining = connection.scalar(select(func.count()).select_from(book_changes))
+    print(f"{book_changes.name}: removed {removed['superseded']} superseded and "
+          f"{removed['expired']} expired entries, {remaining} left")
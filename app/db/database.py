@@ -1,19 +1,103 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync SQLite URL (sqlite:///...) onto the aiosqlite driver."""
+    url = make_url(url)
+    if url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+def sqlite_pragmas() -> list[tuple[str, str]]:
+    """The configured tuning profile, in the order it is applied.
+
+    busy_timeout comes first so the journal mode switch can wait out a lock.
+    """
+    pragmas = [
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("temp_store", settings.SQLITE_TEMP_STORE),
+    ]
+    return [(name, value) for name, value in pragmas if value]
+
+def tune_sqlite_engine(engine: Engine, read_only: bool = False, begin_immediate: bool = False) -> None:
+    """Apply the tuning PRAGMAs to every connection ``engine`` opens.
+
+    ``read_only`` sets query_only, so a GET can never write by accident.
+    ``begin_immediate`` takes the write lock when a transaction starts rather
+    than on its first write. A deferred transaction that reads and then writes
+    fails with SQLITE_BUSY, without waiting, if another worker committed in
+    between.
+    """
+    pragmas = sqlite_pragmas() + ([("query_only", "ON")] if read_only else [])
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        if begin_immediate:
+            # Stop the driver from issuing its own deferred BEGIN
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    if begin_immediate:
+        @event.listens_for(engine, "begin")
+        def begin(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+is_sqlite = make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+# Sync engine, used for schema creation and offline scripts
 engine = create_engine(
     settings.DATABASE_URL, connect_args={"check_same_thread": False}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engines, used by request handlers so queries never block the event loop.
+# SQLite allows one writer at a time, so each worker funnels its writes through
+# a single connection and queues them in the pool instead of at the file lock.
+# Reads use a separate pool that WAL lets run alongside the writer.
+async_database_url = get_async_database_url(settings.DATABASE_URL)
+if is_sqlite:
+    async_engine = create_async_engine(async_database_url, pool_size=1, max_overflow=0)
+    read_engine = create_async_engine(
+        async_database_url, pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0
+    )
+    tune_sqlite_engine(engine)
+    tune_sqlite_engine(async_engine.sync_engine, begin_immediate=True)
+    tune_sqlite_engine(read_engine.sync_engine, read_only=True)
+else:
+    async_engine = read_engine = create_async_engine(async_database_url)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+ReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependencies
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+async def get_read_db():
+    """Session on the read-only pool, for handlers that never write."""
+    async with ReadSessionLocal() as db:
+        yield db
+
+def get_read_session_factory() -> async_sessionmaker:
+    """Dependency for read-only handlers that manage session lifetime
+    themselves, such as streaming responses whose body is produced after
+    the handler returns."""
+    return ReadSessionLocal
@@ -0,0 +1,118 @@
+"""Per-genre and per-author book counts, kept up to date on every write.
+
+``book_facets`` holds one row per (facet, value) with the number of books
+that have it. The book write handlers adjust it in the same transaction as
+the books they insert, update or delete, so a facet listing reads a row per
+genre or author instead of grouping the whole books table. Values whose
+count drops to zero are removed.
+
+Writes that bypass the API, such as manual SQL, are not counted. Rebuild the
+table from the books table with::
+
+    python -m app.db.facets rebuild
+"""
+import argparse
+from collections import Counter
+from typing import Iterable
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, delete, event, func, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.catalog import catalog_state
+from app.db.database import engine
+from app.models.book import Book
+
+FACET_COLUMNS = {"genre": Book.genre, "author": Book.author}
+
+# Kept out of Base.metadata: a new table is filled from books when it is created
+book_facets = Table(
+    "book_facets", MetaData(),
+    Column("facet", String, primary_key=True),
+    Column("value", String, primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+# Lists a facet's most common values first in index order, with no sort step
+Index("ix_book_facets_facet_count", book_facets.c.facet, book_facets.c.count.desc(), book_facets.c.value)
+
+def facet_deltas(removed: Iterable = (), added: Iterable = ()) -> Counter:
+    """Count changes for books going away and books arriving.
+
+    Each book is anything with ``genre`` and ``author`` attributes or keys.
+    An update that keeps a value cancels out and touches nothing.
+    """
+    deltas = Counter()
+    for books, sign in ((removed, -1), (added, 1)):
+        for book in books:
+            for facet in FACET_COLUMNS:
+                value = book[facet] if isinstance(book, dict) else getattr(book, facet)
+                deltas[(facet, value)] += sign
+    return Counter({key: delta for key, delta in deltas.items() if delta})
+
+def _upsert(deltas: Counter):
+    statement = insert(book_facets)
+    return statement.on_conflict_do_update(
+        index_elements=[book_facets.c.facet, book_facets.c.value],
+        set_={"count": book_facets.c.count + statement.excluded["count"]},
+    ), [{"facet": facet, "value": value, "count": delta} for (facet, value), delta in deltas.items()]
+
+async def adjust_facets(db: AsyncSession, deltas: Counter) -> None:
+    """Apply ``deltas`` in the session's transaction; the caller commits."""
+    if not deltas:
+        return
+    statement, params = _upsert(deltas)
+    await db.execute(statement, params)
+    if any(delta < 0 for delta in deltas.values()):
+        # Only decremented values can have reached zero
+        await db.execute(delete(book_facets).where(
+            book_facets.c.count <= 0,
+            tuple_(book_facets.c.facet, book_facets.c.value).in_(
+                [key for key, delta in deltas.items() if delta < 0]
+            ),
+        ))
+
+def rebuild_facets(connection: Connection) -> None:
+    """Recount every facet from the books table."""
+    connection.execute(delete(book_facets))
+    for facet, column in FACET_COLUMNS.items():
+        connection.execute(book_facets.insert().from_select(
+            ["facet", "value", "count"],
+            select(literal(facet), column, func.count()).group_by(column)
+        ))
+
+def ensure_book_facets(connection: Connection) -> bool:
+    """Create the table if missing; returns True when it was created and filled."""
+    exists = connection.dialect.has_table(connection, book_facets.name)
+    if not exists:
+        book_facets.create(connection)
+        rebuild_facets(connection)
+    return not exists
+
+async def get_facets(db: AsyncSession, facet: str, limit: int) -> list[dict]:
+    """The ``limit`` most common values of ``facet``, then by value."""
+    rows = await db.execute(
+        select(book_facets.c.value, book_facets.c.count)
+        .where(book_facets.c.facet == facet)
+        .order_by(book_facets.c.count.desc(), book_facets.c.value)
+        .limit(limit)
+    )
+    return [{"value": value, "count": count} for value, count in rows]
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_book_facets(target, connection, **kw):
+    ensure_book_facets(connection)
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_book_facets(target, connection, **kw):
+    book_facets.drop(connection, checkfirst=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the book facet counts")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    with engine.begin() as connection:
+        if not ensure_book_facets(connection):
+            rebuild_facets(connection)
+        # Cached facet responses are keyed on the catalog version
+        connection.execute(catalog_state.update().values(version=catalog_state.c.version + 1))
+    print(f"{book_facets.name}: rebuild complete")
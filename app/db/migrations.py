@@ -0,0 +1,165 @@
+"""Idempotent upgrades for databases created by older versions of the app.
+
+``create_all`` only creates missing tables; it never alters or indexes a table
+that already exists. ``migrate`` brings an existing books.db up to date and
+records the schema version in ``PRAGMA user_version``.
+
+Workers run this on startup unless ``MIGRATE_ON_STARTUP`` is off, in which
+case run it once per deploy with::
+
+    python -m app.db.migrations
+"""
+import argparse
+import logging
+from datetime import date, datetime
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from app.db.database import Base, engine
+from app.db.catalog import ensure_catalog_version
+from app.db.changes import ensure_change_log
+from app.db.facets import ensure_book_facets
+from app.db.search import ensure_search_index
+from app.models.book import Book
+import app.models.user  # noqa: F401  (register the users table with Base)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 4
+
+# Formats accepted when converting free-form published_date strings. Each
+# names a full day: a bare year or month is not turned into its first day
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d.%m.%Y", "%B %d, %Y", "%b %d, %Y")
+
+def parse_legacy_date(value: str) -> date | None:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def add_legacy_date_column(connection: Connection) -> None:
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(books)")}
+    if "legacy_published_date" not in columns:
+        connection.exec_driver_sql("ALTER TABLE books ADD COLUMN legacy_published_date VARCHAR")
+
+def normalize_published_dates(connection: Connection) -> int:
+    """Rewrite published_date values that are not valid ISO dates.
+
+    The column is now a Date, which fails to load anything else. Values that
+    cannot be parsed are cleared rather than guessed. Every rewritten value
+    keeps its original text in ``legacy_published_date``, so nothing is lost
+    and the cleared rows can be fixed by hand. Returns rows changed.
+    """
+    # date() returns NULL for non-ISO text and normalizes impossible days,
+    # so only malformed values differ from their own date()
+    rows = connection.execute(text(
+        "SELECT id, published_date FROM books "
+        "WHERE published_date IS NOT NULL AND date(published_date) IS NOT published_date"
+    )).all()
+    unparsed = []
+    for book_id, value in rows:
+        parsed = parse_legacy_date(str(value))
+        if parsed is None:
+            unparsed.append(book_id)
+        connection.execute(
+            text("UPDATE books SET published_date = :value, legacy_published_date = :original WHERE id = :id"),
+            {"value": parsed.isoformat() if parsed else None, "original": str(value), "id": book_id}
+        )
+    if rows:
+        logger.info("Normalized %d published dates", len(rows))
+    if unparsed:
+        logger.warning(
+            "Cleared %d published dates that are not full dates; the originals are in "
+            "books.legacy_published_date", len(unparsed), extra={"book_ids": unparsed[:100]}
+        )
+    return len(rows)
+
+def add_version_columns(connection: Connection) -> None:
+    """Add the concurrency version and last-modified time to existing books."""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(books)")}
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE books ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    if "updated_at" not in columns:
+        connection.exec_driver_sql("ALTER TABLE books ADD COLUMN updated_at DATETIME")
+        connection.exec_driver_sql("UPDATE books SET updated_at = CURRENT_TIMESTAMP")
+
+def rebuild_books_with_autoincrement(connection: Connection) -> bool:
+    """Recreate a books table made without AUTOINCREMENT; True if it was.
+
+    Without it SQLite gives a new row the id of a deleted newest row, which
+    also resets its version, so a stale ETag would match a different book.
+    Dropping the table takes its indexes and triggers with it, and ``migrate``
+    creates them again. The external-content search index needs no rebuild,
+    since every row keeps its id.
+    """
+    ddl = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'books'").scalar()
+    if "AUTOINCREMENT" in ddl.upper():
+        return False
+    staging = Book.__table__.to_metadata(MetaData(), name="books_rebuild")
+    # The DDL element alone, so the books table's create hooks don't fire
+    connection.execute(CreateTable(staging))
+    names = ", ".join(column.name for column in Book.__table__.columns)
+    connection.exec_driver_sql(f"INSERT INTO books_rebuild ({names}) SELECT {names} FROM books")
+    connection.exec_driver_sql("DROP TABLE books")
+    connection.exec_driver_sql("ALTER TABLE books_rebuild RENAME TO books")
+
+    # Ids of books deleted before now are only known to the change log
+    highest = connection.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM books").scalar()
+    if connection.dialect.has_table(connection, "book_changes"):
+        highest = max(highest, connection.exec_driver_sql(
+            "SELECT COALESCE(MAX(book_id), 0) FROM book_changes"
+        ).scalar())
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'books'")
+    connection.exec_driver_sql(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('books', {int(highest)})")
+    logger.info("Rebuilt the books table with AUTOINCREMENT ids")
+    return True
+
+def migrate(connection: Connection) -> None:
+    version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    if version < 1:
+        add_legacy_date_column(connection)
+        normalize_published_dates(connection)
+    if version < 2:
+        add_version_columns(connection)
+    if version < 3:
+        # Databases migrated before the column existed
+        add_legacy_date_column(connection)
+    if version < 4:
+        rebuild_books_with_autoincrement(connection)
+
+    for index in Book.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    ensure_search_index(connection)
+    ensure_catalog_version(connection)
+    ensure_change_log(connection)
+    ensure_book_facets(connection)
+
+    if version < SCHEMA_VERSION:
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def prepare_database(engine: Engine) -> None:
+    """Create missing tables and migrate, once, however many workers boot together.
+
+    The checks and the DDL run under SQLite's write lock: the first worker
+    does the work while the rest wait on busy_timeout and find nothing to do.
+    """
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        Base.metadata.create_all(bind=connection)
+        migrate(connection)
+        connection.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create missing tables and migrate the database; run before "
+                    "starting workers with MIGRATE_ON_STARTUP=false"
+    )
+    parser.parse_args()
+
+    prepare_database(engine)
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    print(f"Database is at schema version {version}")
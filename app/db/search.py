@@ -0,0 +1,118 @@
+"""Full-text search over books, backed by an SQLite FTS5 index.
+
+``books_fts`` is an external-content FTS5 table: it stores only the inverted
+index and reads column values back from ``books``. Triggers keep it in step
+with every insert, update and delete, including bulk imports.
+
+Rebuild the index from the books table with::
+
+    python -m app.db.search rebuild
+"""
+import argparse
+import re
+from sqlalchemy import column, event, table, text
+from sqlalchemy.engine import Connection
+from app.db.database import engine
+from app.models.book import Book
+
+SEARCH_TABLE = "books_fts"
+
+# Title matches outrank author matches, which outrank summary matches
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        title, author, summary,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) "
+    f"VALUES ('rank', 'bm25({', '.join(map(str, RANK_WEIGHTS))})')",
+]
+
+SEARCH_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, author, summary)
+        VALUES (new.id, new.title, new.author, new.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, author, summary)
+        VALUES ('delete', old.id, old.title, old.author, old.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE ON books BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, author, summary)
+        VALUES ('delete', old.id, old.title, old.author, old.summary);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, author, summary)
+        VALUES (new.id, new.title, new.author, new.summary);
+    END""",
+]
+
+def ensure_search_index(connection: Connection) -> bool:
+    """Create the FTS table and its triggers if missing.
+
+    Returns True when the index was created, in which case it is also built
+    from the rows already in ``books``.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE}
+    ).first()
+    if not exists:
+        for statement in SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+    for statement in SEARCH_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_search_index(connection)
+    return not exists
+
+def rebuild_search_index(connection: Connection) -> None:
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+def optimize_search_index(connection: Connection) -> None:
+    """Merge index segments; worth running after large imports."""
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        ensure_search_index(connection)
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+_TOKEN = re.compile(r"\w+\*?")
+
+def build_match_query(q: str) -> str | None:
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Each word becomes a quoted term, so user input can never be parsed as FTS
+    syntax; a trailing ``*`` keeps its meaning as a prefix query. Terms are
+    ANDed together. Returns None if the input holds no searchable words.
+    """
+    terms = []
+    for token in _TOKEN.findall(q):
+        prefix = token.endswith("*")
+        word = token.rstrip("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+# Lightweight handle for querying the virtual table alongside the ORM models
+books_fts = table(SEARCH_TABLE, column("rowid"), column("rank"), column(SEARCH_TABLE))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the books full-text index")
+    parser.add_argument("command", choices=["rebuild", "optimize"])
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+        if args.command == "rebuild":
+            rebuild_search_index(connection)
+        else:
+            optimize_search_index(connection)
+    print(f"{SEARCH_TABLE}: {args.command} complete")
@@ -1,12 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.db.database import engine, Base
-from app.api.v1.endpoints import auth, books, health
+from app.db.changes import compact_periodically
+from app.db.database import async_engine, engine
+from app.db.migrations import prepare_database
+from app.api.v1.endpoints import auth, books, health, metrics
 from app.core.errors import http_exception_handler
+from app.core.events import broadcast_backend
+from app.core.logs import RequestIdMiddleware, configure_logging
+from app.core.responses import FastJSONResponse
+from app.core.ratelimit import RateLimitMiddleware, client_key, rate_limiter
+from app.core.metrics import MetricsMiddleware, flush_periodically, instrument_engines, snapshot_store
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+configure_logging()
+
+# Importing this module only defines the app: it opens no connections, so
+# gunicorn --preload can import it once and fork workers that share it.
+# Per-worker state is set up here, after the fork.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.MIGRATE_ON_STARTUP:
+        # Create tables, then bring databases from older versions up to date
+        await asyncio.to_thread(prepare_database, engine)
+        # The sync engine is only for migrations; don't hold its connection open
+        engine.dispose()
+    # Start tailing the shared event log so this worker's SSE clients see every write
+    await broadcast_backend.start()
+    flusher = None
+    if settings.METRICS_ENABLED and snapshot_store is not None:
+        flusher = asyncio.create_task(flush_periodically())
+    compactor = None
+    if settings.CHANGE_LOG_COMPACT_INTERVAL_SECONDS > 0:
+        compactor = asyncio.create_task(compact_periodically(async_engine))
+    yield
+    for task in (flusher, compactor):
+        if task is not None:
+            task.cancel()
+    await broadcast_backend.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -18,6 +50,7 @@ app = FastAPI(
     ## Key Features
     * **🔐 Authentication**: JWT-based authentication with refresh mechanism
     * **📖 Books Management**: Complete CRUD operations with pagination
+    * **🔎 Search**: Ranked full-text search over titles, authors and summaries
     * **🔄 Real-time Updates**: Server-Sent Events for live notifications
     * **🏥 Health Checks**: API and database monitoring
     
@@ -33,13 +66,24 @@ app = FastAPI(
     - Default page size: 50 items
     - Use `page` parameter to navigate
     - Response includes total count and pages
+    - For deep pages, follow `next_cursor` with the `cursor` parameter (keyset pagination)
+    - Pass `include_total=false` to skip counting, or `total=estimate` for a cached count
+    - Optional `sort` keys (e.g. `author,title`) order results before the id tie-breaker;
+      prefix a key with `-` for descending order (e.g. `-published_date`)
+    - Filter with `genre`, `author`, `published_from` and `published_to`
     """,
     version="1.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
+# Rate limits and load shedding, inside CORS so that browsers can read the 429s
+if rate_limiter is not None:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, identify=client_key)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +93,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+if settings.METRICS_ENABLED:
+    # Added last, so it is outermost and times everything else
+    instrument_engines()
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost of all, so every log record of the request carries its ID
+app.add_middleware(RequestIdMiddleware)
+
 # Add error handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
 
@@ -76,6 +128,9 @@ app.include_router(
     tags=["health"]
 )
 
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["health"])
+
 @app.get("/", tags=["root"])
 async def root():
     return {
@@ -1,12 +1,34 @@
-from sqlalchemy import Column, Integer, String
+from datetime import UTC, datetime
+from sqlalchemy import Column, Date, DateTime, Index, Integer, String
 from app.db.database import Base
 
+def utcnow() -> datetime:
+    # SQLite has no timezone-aware type; store naive UTC
+    return datetime.now(UTC).replace(tzinfo=None)
+
 class Book(Base):
     __tablename__ = "books"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String)
+    title = Column(String, index=True)
     author = Column(String)
-    published_date = Column(String)
+    published_date = Column(Date, index=True)
     summary = Column(String)
-    genre = Column(String)
\ No newline at end of file
+    genre = Column(String)
+    # Original text of a published_date the date migration rewrote or cleared
+    legacy_published_date = Column(String)
+    # Bumped by the ORM on every UPDATE, which also checks it still matches,
+    # so concurrent writers cannot silently overwrite each other
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+    # Filter on the leading column, sort or range-scan on the second; SQLite
+    # appends the rowid to every index, which covers the id tie-breaker.
+    # AUTOINCREMENT never hands a deleted book's id to a new one, so an ETag
+    # ("<id>.<version>") can't come back for a different book
+    __table_args__ = (
+        Index("ix_books_author_title", "author", "title"),
+        Index("ix_books_genre_published_date", "genre", "published_date"),
+        {"sqlite_autoincrement": True},
+    )
+    __mapper_args__ = {"version_id_col": version}
@@ -4,7 +4,7 @@ from pydantic import BaseModel
 class BookBase(BaseModel):
     title: str
     author: str
-    published_date: str
+    published_date: date | None
     summary: str
     genre: str
 
@@ -13,12 +13,43 @@ class BookCreate(BookBase):
 
 class Book(BookBase):
     id: int
+    version: int
 
     class Config:
         from_attributes = True
 
 class PaginatedBooks(BaseModel):
-    total: int
+    total: int | None = None
     items: list[Book]
-    page: int
-    pages: int
\ No newline at end of file
+    page: int | None = None
+    pages: int | None = None
+    next_cursor: str | None = None
+
+class BookBatch(BaseModel):
+    items: list[Book]
+    missing: list[int]
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class BookFacets(BaseModel):
+    genre: list[FacetCount] | None = None
+    author: list[FacetCount] | None = None
+
+class BookChange(BaseModel):
+    seq: int
+    op: str
+    book_id: int
+    version: int | None
+    changed_at: str
+    book: Book | None = None
+
+class BookChanges(BaseModel):
+    changes: list[BookChange]
+    next_since: int
+    has_more: bool
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    chunks: int
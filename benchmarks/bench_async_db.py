@@ -0,0 +1,110 @@
+"""Concurrent-request throughput with a blocking Session vs AsyncSession.
+
+"before" replays the old handler pattern: an ``async def`` endpoint calling a
+sync SQLAlchemy Session directly on the event loop. "after" uses the app's
+``get_db`` AsyncSession dependency. Both run the same count + page query that
+``get_books`` issues. A ticker coroutine measures how late the event loop
+wakes up, which is what an open SSE stream experiences.
+
+    python -m benchmarks.bench_async_db --books 200000 --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+DATABASE_URL = os.environ.setdefault("DATABASE_URL", temp_database_url())
+
+from fastapi import Depends, FastAPI  # noqa: E402
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from app.db.database import SessionLocal, engine, get_db  # noqa: E402
+from app.models.book import Book  # noqa: E402
+
+PAGE_QUERY = select(Book).order_by(Book.id).offset(1000).limit(50)
+COUNT_QUERY = select(func.count()).select_from(Book)
+
+def build_blocking_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/books")
+    async def books():
+        # The session is closed inside the handler: with a yield dependency
+        # the blocked event loop could never release pooled connections.
+        with SessionLocal() as db:
+            total = db.scalar(COUNT_QUERY)
+            items = db.scalars(PAGE_QUERY).all()
+        return {"total": total, "items": len(items)}
+
+    return app
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/books")
+    async def books(db: AsyncSession = Depends(get_db)):
+        total = await db.scalar(COUNT_QUERY)
+        items = (await db.scalars(PAGE_QUERY)).all()
+        return {"total": total, "items": len(items)}
+
+    return app
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    loop_lag: list[float] = []
+    stop = asyncio.Event()
+
+    async def ticker(interval: float = 0.005):
+        while not stop.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            loop_lag.append(max(0.0, time.perf_counter() - expected))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/books")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await client.get("/books")  # warm up connections and caches
+        tick = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await tick
+
+    return {
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency": summarize(latencies),
+        "event_loop_lag": summarize(loop_lag),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed_books(engine, args.books)
+    results = {
+        "books": args.books,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "before_blocking_session": asyncio.run(run(build_blocking_app(), args.requests, args.concurrency)),
+        "after_async_session": asyncio.run(run(build_async_app(), args.requests, args.concurrency)),
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Fetching the books named by a burst of events: one GET per ID vs one batch.
+
+Each round picks ``--ids`` random IDs and fetches them either one request at
+a time, as an SSE client following ``book_id``s would, or with a single
+``GET /books/batch``.
+
+    python -m benchmarks.bench_batch --ids 50 --rounds 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+async def run(args) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+        rng = random.Random(0)
+        timings = {"one_request_per_id": [], "batch": []}
+        for _ in range(args.rounds):
+            ids = rng.sample(range(1, args.books + 1), args.ids)
+
+            start = time.perf_counter()
+            for book_id in ids:
+                assert (await client.get(f"/api/v1/books/{book_id}")).status_code == 200
+            timings["one_request_per_id"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            response = await client.get("/api/v1/books/batch", params={"ids": ",".join(map(str, ids))})
+            assert len(response.json()["items"]) == args.ids
+            timings["batch"].append(time.perf_counter() - start)
+    return {name: summarize(samples) for name, samples in timings.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--ids", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    seed_books(engine, args.books)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, hashed_password) VALUES ('bench', 'x')"))
+    print(json.dumps({"ids_per_round": args.ids, **asyncio.run(run(args))}, indent=2))
+
+if __name__ == "__main__":
+    main()
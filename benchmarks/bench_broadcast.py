@@ -0,0 +1,72 @@
+"""Cost of broadcasting one book event to N SSE subscribers.
+
+"before" mirrors the old path: every subscriber queue receives the message
+dict and its stream serializes it with ``json.dumps`` and SSE-encodes it.
+"after" is the current path: ``deliver_book_update`` encodes one shared frame
+and each stream just writes those bytes.
+
+    python -m benchmarks.bench_broadcast --subscribers 10 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sse_starlette.sse import ServerSentEvent
+
+from app.core import events
+
+MESSAGE = {
+    "event": "updated",
+    "book_id": 42,
+    "data": {
+        "id": 42,
+        "title": "The Left Hand of Darkness",
+        "author": "Ursula K. Le Guin",
+        "published_date": "1969-03-01",
+        "summary": "An envoy visits a planet whose people have no fixed sex. " * 3,
+        "genre": "Science Fiction",
+    },
+    "timestamp": "2026-01-01T00:00:00+00:00",
+}
+
+def broadcast_before(subscribers: int, rounds: int) -> float:
+    queues = [[] for _ in range(subscribers)]
+    start = time.perf_counter()
+    for n in range(rounds):
+        message = {**MESSAGE, "id": n}
+        for queue in queues:
+            queue.append(message)
+        for queue in queues:
+            message = queue.pop()
+            ServerSentEvent(json.dumps(message), id=message["id"], event=message["event"]).encode()
+    return (time.perf_counter() - start) / rounds
+
+async def broadcast_after(subscribers: int, rounds: int) -> float:
+    events.book_updates.clear()
+    for n in range(subscribers):
+        await events.get_book_update_queue(str(n))
+    queues = list(events.book_updates.values())
+    start = time.perf_counter()
+    for n in range(rounds):
+        await events.deliver_book_update({**MESSAGE, "id": n})
+        for queue in queues:
+            (await queue.get()).frame
+    elapsed = (time.perf_counter() - start) / rounds
+    events.book_updates.clear()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for subscribers in args.subscribers:
+        before = broadcast_before(subscribers, args.rounds)
+        after = asyncio.run(broadcast_after(subscribers, args.rounds))
+        print(f"{subscribers:>11} {before * 1000:>12.3f} {after * 1000:>11.3f} {before / after:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
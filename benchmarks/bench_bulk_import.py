@@ -0,0 +1,67 @@
+"""Book ingest rate: one POST /books/ per book vs POST /books/bulk.
+
+    python -m benchmarks.bench_bulk_import --single 2000 --bulk 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+
+import httpx  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+
+def make_book(i: int) -> dict:
+    return {
+        "title": f"Imported Book {i}",
+        "author": f"Author {i % 997}",
+        "published_date": "2001-01-01",
+        "summary": f"Summary {i}",
+        "genre": "Fiction",
+    }
+
+async def run(single: int, bulk: int, chunk_size: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/api/v1/auth/register", json={"username": "bench", "password": "bench"})
+        client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+
+        start = time.perf_counter()
+        for i in range(single):
+            (await client.post("/api/v1/books/", json=make_book(i))).raise_for_status()
+        single_rate = single / (time.perf_counter() - start)
+
+        body = "\n".join(json.dumps(make_book(i)) for i in range(bulk))
+        start = time.perf_counter()
+        response = await client.post(
+            f"/api/v1/books/bulk?chunk_size={chunk_size}",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        bulk_rate = bulk / (time.perf_counter() - start)
+
+    return {
+        "single_rows_per_second": round(single_rate, 1),
+        "bulk_rows_per_second": round(bulk_rate, 1),
+        "estimated_100k_single_seconds": round(100_000 / single_rate, 1),
+        "estimated_100k_bulk_seconds": round(100_000 / bulk_rate, 1),
+        "speedup": round(bulk_rate / single_rate, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--single", type=int, default=2000, help="books created one request at a time")
+    parser.add_argument("--bulk", type=int, default=100_000, help="books created through /bulk")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.single, args.bulk, args.chunk_size)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Catching up after ``--changes`` writes: re-download everything vs the change feed.
+
+"full" pages through ``GET /books`` with cursors, as indexers did to resync.
+"incremental" follows ``GET /books/changes`` from the position recorded
+before the writes. Both run ``--rounds`` times with the response cache off.
+Last, the cost the change-log triggers add to a single-row update
+transaction is measured by timing updates with and without them.
+
+    python -m benchmarks.bench_changes --books 100000 --changes 100 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+os.environ["RESPONSE_CACHE_MAX_SIZE"] = "0"
+os.environ["CHANGE_LOG_COMPACT_INTERVAL_SECONDS"] = "0"
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.changes import CHANGE_OPERATIONS, CHANGE_TRIGGERS, compact_change_log  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+async def full_sync(client) -> int:
+    seen, params = 0, {"include_total": "false"}
+    while True:
+        body = (await client.get("/api/v1/books/", params=params)).json()
+        seen += len(body["items"])
+        if body["next_cursor"] is None:
+            return seen
+        params["cursor"] = body["next_cursor"]
+
+async def incremental_sync(client, since: int) -> int:
+    seen = 0
+    while True:
+        body = (await client.get("/api/v1/books/changes", params={"since": since, "limit": 1000})).json()
+        seen += len(body["changes"])
+        since = body["next_since"]
+        if not body["has_more"]:
+            return seen
+
+async def run(args, since: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+        timings = {"full": [], "incremental": []}
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            assert await full_sync(client) == args.books
+            timings["full"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            assert await incremental_sync(client, since) == args.changes
+            timings["incremental"].append(time.perf_counter() - start)
+    return {name: summarize(samples) for name, samples in timings.items()}
+
+def update_commits_us(ids: list[int]) -> float:
+    start = time.perf_counter()
+    for book_id in ids:
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE books SET version = version + 1 WHERE id = :id"), {"id": book_id})
+    return round((time.perf_counter() - start) / len(ids) * 1e6, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=2000, help="transactions timed for the write overhead")
+    args = parser.parse_args()
+
+    seed_books(engine, args.books)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, hashed_password) VALUES ('bench', 'x')"))
+        # Start from a log whose import entries have expired
+        compact_change_log(conn, retention_seconds=-1)
+        since = conn.execute(text("SELECT compacted_through FROM change_log_state")).scalar()
+        for book_id in rng.sample(range(1, args.books + 1), args.changes):
+            conn.execute(text("UPDATE books SET title = title || '!' WHERE id = :id"), {"id": book_id})
+    report = {"books": args.books, "changes": args.changes, **asyncio.run(run(args, since))}
+
+    ids = [rng.randint(1, args.books) for _ in range(args.updates)]
+    with_log = update_commits_us(ids)
+    with engine.begin() as conn:
+        for operation in CHANGE_OPERATIONS:
+            conn.execute(text(f"DROP TRIGGER books_changes_{operation}"))
+    without_log = update_commits_us(ids)
+    with engine.begin() as conn:
+        for statement in CHANGE_TRIGGERS:
+            conn.exec_driver_sql(statement)
+    report["update_commit_us"] = {"with_change_log": with_log, "without": without_log}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
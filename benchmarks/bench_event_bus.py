@@ -0,0 +1,84 @@
+"""Cross-worker fan-out latency of the SQLite event log backend.
+
+Starts ``--workers`` processes that each behave like a gunicorn worker: they
+tail the shared log, hold ``--subscribers`` local SSE queues, and publish
+``--rate`` events per second for ``--duration`` seconds. Latency is measured
+from publish to the moment each subscriber queue yields the event.
+
+    python -m benchmarks.bench_event_bus --workers 4 --subscribers 100 --rate 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import summarize
+
+def worker(index: int, args, results) -> None:
+    os.environ["EVENT_BACKEND"] = "sqlite"
+    os.environ["EVENT_LOG_PATH"] = args.path
+    os.environ["EVENT_POLL_INTERVAL"] = str(args.poll_interval)
+    from app.core import events
+
+    async def run():
+        expected = args.workers * int(args.rate * args.duration)
+        latencies: list[float] = []
+
+        async def subscriber(client_id: str):
+            queue = await events.get_book_update_queue(client_id)
+            for _ in range(expected):
+                event = await queue.get()
+                latencies.append(time.time() - event.decode()["data"]["sent_at"])
+
+        await events.broadcast_backend.start()
+        consumers = [
+            asyncio.create_task(subscriber(f"{index}-{n}"))
+            for n in range(args.subscribers)
+        ]
+        # Give every worker time to attach before anyone publishes
+        await asyncio.sleep(args.start_at - time.time())
+        for n in range(int(args.rate * args.duration)):
+            await events.send_book_update("updated", n, {"sent_at": time.time()})
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.wait_for(asyncio.gather(*consumers), timeout=60)
+        await events.broadcast_backend.stop()
+        return latencies
+
+    results.put(asyncio.run(run()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--subscribers", type=int, default=100, help="SSE clients per worker")
+    parser.add_argument("--rate", type=float, default=50, help="events/s published by each worker")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    args = parser.parse_args()
+    args.path = os.path.join(tempfile.mkdtemp(), "events.db")
+    args.start_at = time.time() + 2
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(i, args, results))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    latencies = [latency for _ in processes for latency in results.get()]
+    for process in processes:
+        process.join()
+
+    print(json.dumps({
+        "workers": args.workers,
+        "subscribers_per_worker": args.subscribers,
+        "events_per_second": args.workers * args.rate,
+        "poll_interval_ms": args.poll_interval * 1000,
+        "deliveries": len(latencies),
+        "fan_out_latency": summarize(latencies),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Facet counts from the book_facets table versus grouping the books table.
+
+"group_by" is what a dashboard had to do before: count every book per genre
+and per author. "facets" reads the maintained counts. Both return each
+genre and the ``--limit`` most common authors, and are checked to agree.
+
+    python -m benchmarks.bench_facets --rows 200000 --repeat 50
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import create_engine, func, select
+
+from app.db.facets import FACET_COLUMNS, book_facets, rebuild_facets
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+def group_by(conn, limit: int) -> dict:
+    result = {}
+    for facet, column in FACET_COLUMNS.items():
+        count = func.count().label("count")
+        rows = conn.execute(
+            select(column, count).group_by(column).order_by(count.desc(), column).limit(limit)
+        )
+        result[facet] = [tuple(row) for row in rows]
+    return result
+
+def from_facets(conn, limit: int) -> dict:
+    result = {}
+    for facet in FACET_COLUMNS:
+        rows = conn.execute(
+            select(book_facets.c.value, book_facets.c.count)
+            .where(book_facets.c.facet == facet)
+            .order_by(book_facets.c.count.desc(), book_facets.c.value)
+            .limit(limit)
+        )
+        result[facet] = [tuple(row) for row in rows]
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(temp_database_url())
+    seed_books(engine, args.rows)
+    report = {}
+    with engine.begin() as conn:
+        start = time.perf_counter()
+        rebuild_facets(conn)
+        report["rebuild_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    with engine.connect() as conn:
+        assert group_by(conn, args.limit) == from_facets(conn, args.limit)
+        for name, query in (("group_by", group_by), ("facets", from_facets)):
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                query(conn, args.limit)
+                samples.append(time.perf_counter() - start)
+            report[name] = summarize(samples)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
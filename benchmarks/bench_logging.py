@@ -0,0 +1,126 @@
+"""List-endpoint throughput with synchronous vs queued logging.
+
+"before" puts back the five f-string INFO lines the list handler used to
+emit, each written to the sink by a synchronous handler on the event loop.
+"after" is the current code: one guarded DEBUG record, which is skipped at
+INFO, with every other record going through the queue. Both runs log
+uvicorn-style access lines, one per request, to the same sink.
+``--sink-latency-ms`` slows each write, as a pipe to a busy log collector
+would. The response cache is off, so every request runs the handler.
+
+    python -m benchmarks.bench_logging --requests 2000 --concurrency 20 --sink-latency-ms 1
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+os.environ["RESPONSE_CACHE_MAX_SIZE"] = "0"
+os.environ["LOG_LEVEL"] = "INFO"
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.api.v1.endpoints import books  # noqa: E402
+from app.core import logs  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+class SlowSink(io.TextIOBase):
+    """Discards output, but only after ``latency`` seconds per write."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        self.writes += 1
+        time.sleep(self.latency)
+        return len(data)
+
+original_list_books_page = books.list_books_page
+
+async def chatty_list_books_page(page, cursor, sort, include_total, total_mode, *args, **kwargs):
+    # The logging the handler did before, in the same places
+    result = await original_list_books_page(page, cursor, sort, include_total, total_mode, *args, **kwargs)
+    books.logger.info(f"Total books in DB: {result['total']}")
+    books.logger.info(f"Total pages: {result['pages']}")
+    books.logger.info(f"Skipping {(page - 1) * 50} items")
+    books.logger.info(f"Retrieved {len(result['items'])} books")
+    books.logger.info(f"Result length: {len(result['items'])}")
+    return result
+
+def use_logging(mode: str, sink: SlowSink) -> None:
+    root = logging.getLogger()
+    root.handlers.clear()
+    logs.stop_logging()
+    if mode == "before":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        root.addHandler(handler)
+        books.list_books_page = chatty_list_books_page
+    else:
+        logs.configure_logging(stream=sink)
+        books.list_books_page = original_list_books_page
+    root.setLevel(logging.INFO)
+
+async def run(mode: str, args) -> dict:
+    sink = SlowSink(args.sink_latency_ms / 1000)
+    use_logging(mode, sink)
+    access = logging.getLogger("uvicorn.access")
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(args.requests):
+            queue.put_nowait(i % 20 + 1)
+
+        async def worker():
+            while not queue.empty():
+                page = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(f"/api/v1/books/?page={page}")
+                assert response.status_code == 200, response.text
+                access.info('%s - "%s %s HTTP/1.1" %d', "127.0.0.1", "GET", "/api/v1/books/", 200)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+    logs.stop_logging()  # drain the queue before counting
+    return {
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "sink_writes": sink.writes,
+        **summarize(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sink-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    seed_books(engine, args.books)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, hashed_password) VALUES ('bench', 'x')"))
+
+    async def both():
+        # One event loop for both, since the engine's pools are bound to it
+        return {mode: await run(mode, args) for mode in ("before", "after")}
+
+    results = asyncio.run(both())
+    logging.getLogger().handlers.clear()
+    print(json.dumps({"sink_latency_ms": args.sink_latency_ms, **results}, indent=2))
+
+if __name__ == "__main__":
+    main()
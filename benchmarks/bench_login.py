@@ -0,0 +1,83 @@
+"""Latency of unrelated requests during a login burst.
+
+Fires ``--logins`` concurrent logins (each one bcrypt verification) while a
+probe requests ``/api/v1/health`` every 5 ms. "before" verifies passwords
+inline on the event loop as the old handler did; "after" uses the bounded
+bcrypt thread pool.
+
+    python -m benchmarks.bench_login --logins 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import summarize, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+
+import httpx  # noqa: E402
+
+from app.api.v1.endpoints import auth  # noqa: E402
+from app.core.security import verify_password, verify_password_async  # noqa: E402
+from app.main import app  # noqa: E402
+
+USER = {"username": "bench", "password": "bench-password"}
+
+async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+async def run(logins: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    # The lifespan creates the schema
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/auth/register", json=USER)  # 400 on the second run
+        probe_latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        done = asyncio.Event()
+
+        async def probe():
+            # Latency counts from when the request was due, so time spent
+            # waiting for a blocked event loop is included
+            while not done.is_set():
+                due = time.perf_counter() + 0.005
+                await asyncio.sleep(0.005)
+                await client.get("/api/v1/health")
+                probe_latencies.append(time.perf_counter() - due)
+
+        async def login():
+            response = await client.post("/api/v1/auth/login", data=USER)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return {
+        "login_burst_seconds": round(elapsed, 3),
+        "login_statuses": statuses,
+        "health_latency_during_burst": summarize(probe_latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=30)
+    args = parser.parse_args()
+
+    async def compare():
+        auth.verify_password_async = inline_verify
+        before = await run(args.logins)
+        auth.verify_password_async = verify_password_async
+        after = await run(args.logins)
+        return before, after
+
+    before, after = asyncio.run(compare())
+    print(json.dumps({"logins": args.logins, "before_inline_bcrypt": before, "after_hash_pool": after}, indent=2))
+
+if __name__ == "__main__":
+    main()
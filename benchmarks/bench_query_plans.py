@@ -0,0 +1,105 @@
+"""Filter/sort query plans and latency with and without the books indexes.
+
+Every 50th book is left undated. Cursor queries run their keyset phases in
+order until the page is full, as the listing endpoint does, and report the
+plan of each phase that ran.
+
+    python -m benchmarks.bench_query_plans --rows 500000
+"""
+import argparse
+import json
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, func, select, update
+
+from app.core.pagination import keyset_phases
+from app.models.book import Book
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+PAGE = 50
+
+def cursor_page(query, columns, values, descending=None) -> list:
+    return [query.where(condition) for condition in keyset_phases(columns, values, descending)]
+
+NEWEST_FIRST = select(Book).order_by(Book.published_date.desc(), Book.id.desc()).limit(PAGE)
+
+QUERIES = {
+    "genre + date range, newest first": (
+        select(Book)
+        .where(Book.genre == "Fantasy", Book.published_date >= date(2000, 1, 1))
+        .order_by(Book.published_date.desc(), Book.id.desc())
+        .limit(PAGE)
+    ),
+    "newest first, deep cursor": cursor_page(
+        NEWEST_FIRST, [Book.published_date, Book.id], ["1960-06-01", 100_000], [True, True]
+    ),
+    "newest first, cursor reaching the undated books": cursor_page(
+        NEWEST_FIRST, [Book.published_date, Book.id], ["1950-01-01", 20], [True, True]
+    ),
+    "author, sorted by title": (
+        select(Book).where(Book.author == "Author 42").order_by(Book.title, Book.id).limit(PAGE)
+    ),
+    "date range count": (
+        select(func.count()).select_from(Book)
+        .where(Book.published_date.between(date(1990, 1, 1), date(1990, 12, 31)))
+    ),
+    "sort by date, deep cursor": cursor_page(
+        select(Book).order_by(Book.published_date, Book.id).limit(PAGE),
+        [Book.published_date, Book.id], ["2010-06-01", 400_000]
+    ),
+}
+
+def explain(conn, query) -> list[str]:
+    compiled = query.compile(conn, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+def run(conn, phases: list) -> list:
+    """Run phases until a page is full; returns the ones that ran."""
+    rows, ran = [], []
+    for phase in phases:
+        ran.append(phase)
+        rows += conn.execute(phase.limit(PAGE - len(rows))).all()
+        if len(rows) >= PAGE:
+            break
+    return ran
+
+def measure(conn, repeat: int) -> dict:
+    results = {}
+    for name, query in QUERIES.items():
+        phases = query if isinstance(query, list) else [query]
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ran = run(conn, phases)
+            samples.append(time.perf_counter() - start)
+        plan = [step for phase in ran for step in explain(conn, phase.limit(PAGE))]
+        results[name] = {"plan": plan, "p50_ms": summarize(samples)["p50_ms"]}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(temp_database_url())
+    seed_books(engine, args.rows)
+
+    with engine.begin() as conn:
+        conn.execute(update(Book).where(Book.id % 50 == 0).values(published_date=None))
+        conn.exec_driver_sql("ANALYZE")
+    with engine.connect() as conn:
+        indexed = measure(conn, args.repeat)
+    with engine.begin() as conn:
+        for index in Book.__table__.indexes:
+            if index.name != "ix_books_id":
+                index.drop(conn)
+    engine.dispose()
+    with engine.connect() as conn:
+        unindexed = measure(conn, args.repeat)
+
+    print(json.dumps({"rows": args.rows, "indexed": indexed, "unindexed": unindexed}, indent=2))
+
+if __name__ == "__main__":
+    main()
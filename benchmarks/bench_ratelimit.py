@@ -0,0 +1,119 @@
+"""Latency of well-behaved clients while one client floods the API.
+
+``--abusers`` loops share one identity and together send ``--abuser-rate``
+requests per second, whatever the answers. They alternate failed logins,
+each costing a bcrypt verification when admitted, with uncached list pages.
+The rate is fixed because the abuser runs in the server's process here: a
+loop retrying every instant 429 would burn CPU a real remote client spends
+on its own machine. Next
+to them, ``--clients`` loops of other users fetch single books. The run is
+repeated with rate limiting off and on, each in a fresh process, and
+reports the well-behaved clients' latency and the abuser's status codes.
+
+    python -m benchmarks.bench_ratelimit --abusers 50 --abuser-rate 200 --clients 5 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import time
+from collections import Counter
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+def worker(enabled: bool, url: str, args, results) -> None:
+    os.environ.update({
+        "DATABASE_URL": url,
+        "RATE_LIMIT_ENABLED": "true" if enabled else "false",
+        "RESPONSE_CACHE_MAX_SIZE": "0",
+    })
+    import httpx
+
+    from app.core.security import create_access_token
+    from app.main import app
+
+    async def run():
+        latencies, abuser_statuses = [], Counter()
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            deadline = time.perf_counter() + args.duration
+
+            async def abuser():
+                headers = {"Authorization": f"Bearer {create_access_token({'sub': 'abuser'})}"}
+                interval = args.abusers / args.abuser_rate
+                next_send = time.perf_counter() + random.random() * interval
+                while time.perf_counter() < deadline:
+                    await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+                    next_send += interval
+                    if random.random() < 0.5:
+                        response = await http.post(
+                            "/api/v1/auth/login", data={"username": "bench0", "password": "wrong"}
+                        )
+                    else:
+                        response = await http.get(
+                            f"/api/v1/books/?page={random.randint(1, 100)}", headers=headers
+                        )
+                    abuser_statuses[response.status_code] += 1
+
+            async def client(n: int):
+                headers = {"Authorization": f"Bearer {create_access_token({'sub': f'bench{n}'})}"}
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    response = await http.get(f"/api/v1/books/{random.randint(1, args.rows)}", headers=headers)
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - start)
+                    # A person paging through books, not a tight loop
+                    await asyncio.sleep(0.05)
+
+            await asyncio.gather(
+                *[abuser() for _ in range(args.abusers)],
+                *[client(n) for n in range(args.clients)],
+            )
+        return {
+            "client_requests_per_second": round(len(latencies) / args.duration, 1),
+            **summarize(latencies),
+            "abuser_statuses": dict(abuser_statuses),
+        }
+
+    results.put(asyncio.run(run()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--abusers", type=int, default=50, help="concurrent loops of the flooding client")
+    parser.add_argument("--abuser-rate", type=float, default=200, help="requests per second across the loops")
+    parser.add_argument("--clients", type=int, default=5, help="well-behaved users")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    os.environ.setdefault("SECRET_KEY", secrets.token_urlsafe(32))
+
+    from app.core.security import get_password_hash
+    hashed = get_password_hash("password")
+    report = {}
+    # Spawn, so each run imports the app with its own settings
+    context = multiprocessing.get_context("spawn")
+    for enabled in (False, True):
+        url = temp_database_url()
+        engine = create_engine(url)
+        seed_books(engine, args.rows)
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO users (username, hashed_password) VALUES (:username, :hashed)"),
+                [{"username": f"bench{n}", "hashed": hashed} for n in range(args.clients)]
+                + [{"username": "abuser", "hashed": hashed}],
+            )
+        engine.dispose()
+        results = context.Queue()
+        process = context.Process(target=worker, args=(enabled, url, args, results))
+        process.start()
+        report["rate_limited" if enabled else "unprotected"] = results.get(timeout=args.duration + 120)
+        process.join()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
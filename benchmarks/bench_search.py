@@ -0,0 +1,72 @@
+"""Full-text search latency: FTS5 MATCH vs a LIKE scan over the books table.
+
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import create_engine, or_, select
+
+from app.db.search import books_fts, build_match_query
+from app.models.book import Book
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+# Every synthetic row shares words like "book" and "summary"; the numbers
+# are what make a query selective, as real titles and names would be.
+QUERIES = ["123456", "summary 654321", "99999*", "author 42"]
+
+def fts_query(q: str):
+    return (
+        select(Book.id)
+        .join(books_fts, books_fts.c.rowid == Book.id)
+        .where(books_fts.c.books_fts.op("MATCH")(build_match_query(q)))
+        .order_by(books_fts.c.rank, Book.id)
+        .limit(20)
+    )
+
+def like_query(q: str):
+    terms = [word.rstrip("*") for word in q.split()]
+    return (
+        select(Book.id)
+        .where(*[
+            or_(Book.title.like(f"%{t}%"), Book.author.like(f"%{t}%"), Book.summary.like(f"%{t}%"))
+            for t in terms
+        ])
+        .order_by(Book.id)
+        .limit(20)
+    )
+
+def measure(conn, build, repeat: int) -> dict:
+    results = {}
+    for q in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(build(q)).all()
+            samples.append(time.perf_counter() - start)
+        results[q] = summarize(samples)["p50_ms"]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(temp_database_url())
+    start = time.perf_counter()
+    seed_books(engine, args.rows)
+    seed_seconds = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        results = {
+            "rows": args.rows,
+            "seed_seconds_with_index": round(seed_seconds, 1),
+            "fts5_p50_ms": measure(conn, fts_query, args.repeat),
+            "like_scan_p50_ms": measure(conn, like_query, 1),
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-page cost of fetching and encoding a 50-book listing page.
+
+"before" loads ORM objects, then validates them through ``PaginatedBooks``
+and calls ``model_dump_json``, as the list handler used to. "stdlib" is
+FastAPI's default route for a returned model: ``jsonable_encoder`` and then
+``json.dumps``. "after" is the current fast path: plain row tuples zipped
+into dicts and encoded by pydantic-core. Fetch and encode are timed
+separately, and the three bodies are checked to carry the same data.
+
+    python -m benchmarks.bench_serialization --books 10000 --rounds 2000
+"""
+import argparse
+import json
+import os
+import timeit
+
+from benchmarks.common import seed_books, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.v1.endpoints.books import BOOK_COLUMNS, book_rows_to_dicts  # noqa: E402
+from app.core.responses import encode_json  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.models.book import Book  # noqa: E402
+from app.schemas.book import PaginatedBooks  # noqa: E402
+
+def page(items) -> dict:
+    return {"total": 10_000, "items": items, "page": 11, "pages": 200, "next_cursor": None}
+
+def per_call_us(func, rounds: int) -> float:
+    return round(timeit.timeit(func, number=rounds) / rounds * 1e6, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed_books(engine, args.books)
+    with Session(engine) as session:
+        orm_query = select(Book).order_by(Book.id).offset(500).limit(50)
+        row_query = select(*BOOK_COLUMNS).order_by(Book.id).offset(500).limit(50)
+
+        def fetch_orm():
+            session.expunge_all()  # each request starts with an empty identity map
+            return session.scalars(orm_query).all()
+
+        def fetch_rows():
+            return session.execute(row_query).all()
+
+        books, rows = fetch_orm(), fetch_rows()
+        encoders = {
+            "before": lambda: PaginatedBooks.model_validate(page(books)).model_dump_json().encode(),
+            "stdlib": lambda: json.dumps(jsonable_encoder(PaginatedBooks.model_validate(page(books)))).encode(),
+            "after": lambda: encode_json(page(book_rows_to_dicts(rows))),
+        }
+        bodies = {name: json.loads(encode()) for name, encode in encoders.items()}
+        assert bodies["before"] == bodies["stdlib"] == bodies["after"]
+
+        fetch = {"before": fetch_orm, "stdlib": fetch_orm, "after": fetch_rows}
+        report = {}
+        for name, encode in encoders.items():
+            fetch_us = per_call_us(fetch[name], args.rounds)
+            encode_us = per_call_us(encode, args.rounds)
+            report[name] = {"fetch_us": fetch_us, "encode_us": encode_us, "total_us": round(fetch_us + encode_us, 1)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Mixed read/write load from several worker processes on one SQLite file,
+with SQLite's defaults vs the tuning profile.
+
+Each process behaves like a gunicorn worker. It imports the app with the
+profile's settings and runs ``--clients`` concurrent loops for
+``--duration`` seconds. Each loop issues single-book GETs, list pages, and a
+``--write-ratio`` share of PUTs. The response cache is disabled so every read
+reaches the database. It also measures the raw rate of single-row write
+transactions with each profile's PRAGMAs, without the app in the way.
+
+    python -m benchmarks.bench_sqlite_tuning --workers 4 --clients 16
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+PROFILES = {
+    # Empty values leave SQLite's defaults: rollback journal, synchronous=FULL
+    "defaults": {
+        "SQLITE_JOURNAL_MODE": "",
+        "SQLITE_SYNCHRONOUS": "",
+        "SQLITE_CACHE_SIZE": "",
+        "SQLITE_MMAP_SIZE": "",
+        "SQLITE_TEMP_STORE": "",
+    },
+    "tuned": {},
+}
+
+def worker(profile: str, url: str, args, results) -> None:
+    os.environ.update({
+        "DATABASE_URL": url,
+        "RESPONSE_CACHE_MAX_SIZE": "0",
+        "EVENT_BACKEND": "memory",
+        **PROFILES[profile],
+    })
+    import httpx
+
+    from app.core.security import create_access_token
+    from app.main import app
+
+    async def client(http, samples, errors, deadline):
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            book_id = rng.randint(1, args.rows)
+            roll = rng.random()
+            if roll < args.write_ratio:
+                kind = "write"
+                request = http.put(f"/api/v1/books/{book_id}", json={
+                    "title": f"Edited {rng.random()}", "author": "Bench",
+                    "published_date": "2001-01-01", "summary": "Edited", "genre": "Fiction",
+                })
+            elif roll < args.write_ratio + 0.15:
+                kind = "list"
+                request = http.get(f"/api/v1/books/?page={rng.randint(1, 20)}&include_total=false")
+            else:
+                kind = "get"
+                request = http.get(f"/api/v1/books/{book_id}")
+            start = time.perf_counter()
+            try:
+                response = await request
+                ok = response.status_code < 500
+            except Exception:
+                ok = False
+            if ok:
+                samples[kind].append(time.perf_counter() - start)
+            else:
+                errors[kind] += 1
+
+    async def run():
+        samples = {"get": [], "list": [], "write": []}
+        errors = {"get": 0, "list": 0, "write": 0}
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            http.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+            await http.get("/api/v1/books/1")  # warm the auth cache and pools
+            await asyncio.sleep(max(0.0, args.start_at - time.time()))
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(*[client(http, samples, errors, deadline) for _ in range(args.clients)])
+        return samples, errors
+
+    results.put(asyncio.run(run()))
+
+def commit_rate(profile: str, results, commits: int = 2000) -> None:
+    os.environ.update(PROFILES[profile])
+    from app.db.database import sqlite_pragmas
+
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), "commits.db"), isolation_level=None)
+    for name, value in sqlite_pragmas():
+        conn.execute(f"PRAGMA {name} = {value}")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)")
+    conn.executemany("INSERT INTO t (v) VALUES (?)", [(i,) for i in range(1000)])
+    start = time.perf_counter()
+    for i in range(commits):
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE t SET v = v + 1 WHERE id = ?", (i % 1000 + 1,))
+        conn.execute("COMMIT")
+    results.put(round(commits / (time.perf_counter() - start)))
+
+def run_profile(profile: str, args) -> dict:
+    url = temp_database_url()
+    engine = create_engine(url)
+    seed_books(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, hashed_password) VALUES ('bench', 'x')"))
+    engine.dispose()
+
+    # Spawn, not fork: seeding imported the app here, and each worker must
+    # import it afresh with its own profile's settings
+    context = multiprocessing.get_context("spawn")
+    args.start_at = time.time() + 5
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(profile, url, args, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = {"get": [], "list": [], "write": []}
+    errors = {"get": 0, "list": 0, "write": 0}
+    for _ in processes:
+        worker_samples, worker_errors = results.get(timeout=args.duration + 120)
+        for kind in samples:
+            samples[kind].extend(worker_samples[kind])
+            errors[kind] += worker_errors[kind]
+    for process in processes:
+        process.join()
+
+    process = context.Process(target=commit_rate, args=(profile, results))
+    process.start()
+    commits_per_second = results.get(timeout=120)
+    process.join()
+
+    report = {"raw_commits_per_second": commits_per_second}
+    for kind in samples:
+        report[kind] = {
+            "requests_per_second": round(len(samples[kind]) / args.duration, 1),
+            "errors": errors[kind],
+            **summarize(samples[kind]),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent loops per worker")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--profile", choices=[*PROFILES, "both"], default="both")
+    args = parser.parse_args()
+    # Tokens must verify in every worker process
+    os.environ.setdefault("SECRET_KEY", secrets.token_urlsafe(32))
+
+    profiles = list(PROFILES) if args.profile == "both" else [args.profile]
+    print(json.dumps({
+        "workers": args.workers,
+        "clients_per_worker": args.clients,
+        "write_ratio": args.write_ratio,
+        **{profile: run_profile(profile, args) for profile in profiles},
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Worker cold start: importing the app, starting it, and its first requests.
+
+"fresh" starts each sample in a new interpreter, as a worker without
+``--preload`` does: it imports ``app.main``, runs the lifespan startup and
+makes ``--requests`` calls to ``GET /books/{id}``. "preloaded" imports the
+app once in a master process and forks each sample from it, as gunicorn
+``--preload`` does when it starts or recycles a worker; it times the same
+steps from the fork. Both run against a database that already holds
+``--books`` books and an up-to-date schema.
+
+    python -m benchmarks.bench_startup --samples 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import seed_books, summarize, temp_database_url
+
+async def first_requests(app, requests: int, started: float) -> dict:
+    """Run the lifespan and the first requests; times are from ``started``."""
+    import httpx
+    from app.core.security import create_access_token
+
+    timings = {}
+    lifespan_started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings["lifespan_startup"] = time.perf_counter() - lifespan_started
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'bench'})}"
+            for n in range(requests):
+                sent = time.perf_counter()
+                assert (await client.get(f"/api/v1/books/{n + 1}")).status_code == 200
+                timings[f"request_{n + 1}"] = time.perf_counter() - sent
+                if n == 0:
+                    timings["to_first_response"] = time.perf_counter() - started
+    return timings
+
+def fresh(requests: int) -> None:
+    # The client is not part of the worker, so it loads before timing starts
+    import httpx  # noqa: F401
+
+    started = time.perf_counter()
+    from app.main import app
+    timings = {"import": time.perf_counter() - started}
+    timings.update(asyncio.run(first_requests(app, requests, started)))
+    print(json.dumps([timings]))
+
+def preloaded(requests: int, samples: int) -> None:
+    import httpx  # noqa: F401
+
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter() - started
+
+    results = []
+    for _ in range(samples):
+        read_end, write_end = os.pipe()
+        forked = time.perf_counter()  # CLOCK_MONOTONIC, the same in parent and child
+        if os.fork() == 0:
+            os.close(read_end)
+            timings = asyncio.run(first_requests(app, requests, forked))
+            os.write(write_end, json.dumps(timings).encode())
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.wait()
+    print(json.dumps([{"master_import": imported}] + results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--child", choices=["fresh", "preloaded"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child == "fresh":
+        fresh(args.requests)
+        return
+    if args.child == "preloaded":
+        preloaded(args.requests, args.samples)
+        return
+
+    url = temp_database_url()
+    environment = {**os.environ, "DATABASE_URL": url, "METRICS_ENABLED": "false"}
+    engine = create_engine(url)
+    seed_books(engine, args.books)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, hashed_password) VALUES ('bench', 'x')"))
+    engine.dispose()
+
+    def run(mode: str) -> list[dict]:
+        command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode,
+                   "--requests", str(args.requests), "--samples", str(args.samples)]
+        output = subprocess.run(command, env=environment, check=True, capture_output=True, text=True).stdout
+        return json.loads(output.splitlines()[-1])
+
+    report = {}
+    fresh_runs = [timings for _ in range(args.samples) for timings in run("fresh")]
+    preloaded_runs = run("preloaded")
+    for mode, runs in (("fresh", fresh_runs), ("preloaded", preloaded_runs)):
+        samples: dict[str, list[float]] = {}
+        for timings in runs:
+            for name, value in timings.items():
+                samples.setdefault(name, []).append(value)
+        report[mode] = {name: summarize(values) for name, values in samples.items()}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
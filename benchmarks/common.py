@@ -0,0 +1,75 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks never touch app/db/books.db: each run seeds its own temporary
+SQLite file, and scripts that import the app point DATABASE_URL at it first.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date
+
+# In-process clients would otherwise log every request they make at INFO
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Benchmarks drive the app as one client, which its rate limits would throttle
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# One process, so events need no shared log; bench_event_bus measures that backend
+os.environ.setdefault("EVENT_BACKEND", "memory")
+
+def temp_database_url() -> str:
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+def seed_books(engine, count: int, batch_size: int = 10_000) -> None:
+    """Create the schema and insert ``count`` synthetic books."""
+    from app.db.facets import rebuild_facets
+    from app.db.migrations import prepare_database
+    from app.models.book import Book
+
+    # The full schema, with the search index, triggers and side tables a worker would create
+    prepare_database(engine)
+    genres = ["Fiction", "History", "Science", "Poetry", "Fantasy", "Biography"]
+    with engine.begin() as conn:
+        for start in range(0, count, batch_size):
+            conn.execute(
+                Book.__table__.insert(),
+                [
+                    {
+                        "title": f"Book {i}",
+                        "author": f"Author {i % 997}",
+                        "published_date": date(1950 + i % 70, 1 + i % 12, 1 + i % 28),
+                        "summary": f"Synthetic summary number {i}",
+                        "genre": genres[i % len(genres)],
+                    }
+                    for i in range(start, min(start + batch_size, count))
+                ],
+            )
+        # The rows above bypass the write handlers that keep facet counts
+        rebuild_facets(conn)
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples: list[float]) -> dict:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["elapsed"] = time.perf_counter() - start
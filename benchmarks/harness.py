@@ -0,0 +1,307 @@
+"""Mixed-workload load test for the whole API, run in-process.
+
+Seeds a temporary database with ``--rows`` books, boots the app (including
+its lifespan) and runs ``--concurrency`` client loops for ``--duration``
+seconds. Each loop picks an operation by the ``--mix`` weights. Meanwhile,
+``--sse`` subscribers hold /books/stream open. Throughput and p50/p95/p99
+latency are reported per endpoint and written to ``--output`` as JSON. Pass
+a previous file to ``--compare`` to flag regressions.
+
+    python -m benchmarks.harness --rows 50000 --duration 30 --sse 50
+    python -m benchmarks.harness --compare benchmarks/results/baseline.json
+
+``--replay`` plays a JSONL file of recorded requests as one more operation.
+Each line holds ``method`` and ``path``, plus optional ``json``, ``params``
+and ``headers``. Lines without a method and path are skipped and counted.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+
+from benchmarks.common import percentile, seed_books, temp_database_url
+
+os.environ.setdefault("DATABASE_URL", temp_database_url())
+os.environ.setdefault("EVENT_BACKEND", "memory")
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+USER = {"username": "bench", "password": "bench-password"}
+DEFAULT_MIX = "get=50,list=20,search=10,write=10,create=5,login=5"
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(OPERATIONS) - {"replay"}
+    if unknown:
+        raise SystemExit(f"Unknown operation(s) in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+def load_replay(path: str) -> tuple[list[dict], int]:
+    requests, skipped = [], 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, dict) and entry.get("method") and entry.get("path"):
+                requests.append(entry)
+            else:
+                skipped += 1
+    return requests, skipped
+
+def book_payload(rng: random.Random) -> dict:
+    return {
+        "title": f"Harness Book {rng.randrange(10**9)}",
+        "author": f"Author {rng.randrange(997)}",
+        "published_date": "2001-01-01",
+        "summary": "Written by the benchmark harness",
+        "genre": "Fiction",
+    }
+
+# Each operation returns (endpoint label, response coroutine)
+OPERATIONS = {
+    "get": lambda http, rng, rows: (
+        "GET /books/{id}", http.get(f"/api/v1/books/{rng.randint(1, rows)}")
+    ),
+    "list": lambda http, rng, rows: (
+        "GET /books", http.get("/api/v1/books/", params={"page": rng.randint(1, 5)})
+    ),
+    "search": lambda http, rng, rows: (
+        "GET /books/search", http.get("/api/v1/books/search", params={"q": str(rng.randint(1, rows))})
+    ),
+    "write": lambda http, rng, rows: (
+        "PUT /books/{id}", http.put(f"/api/v1/books/{rng.randint(1, rows)}", json=book_payload(rng))
+    ),
+    "create": lambda http, rng, rows: (
+        "POST /books", http.post("/api/v1/books/", json=book_payload(rng))
+    ),
+    "login": lambda http, rng, rows: (
+        "POST /auth/login", http.post("/api/v1/auth/login", data=USER)
+    ),
+}
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label: str, status: int | str, elapsed: float) -> None:
+        self.statuses[label][str(status)] += 1
+        if isinstance(status, int) and status < 500:
+            self.latencies[label].append(elapsed)
+
+    def report(self, duration: float) -> dict:
+        endpoints = {}
+        for label in sorted(self.statuses):
+            samples = self.latencies[label]
+            statuses = dict(self.statuses[label])
+            errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3", "4")))
+            endpoints[label] = {
+                "requests": sum(statuses.values()),
+                "throughput_rps": round(len(samples) / duration, 1),
+                "errors": errors,
+                "statuses": statuses,
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(max(samples, default=0) * 1000, 2),
+            }
+        return endpoints
+
+async def client_loop(http, weights, rows, replay, recorder, deadline, seed):
+    rng = random.Random(seed)
+    names, odds = list(weights), list(weights.values())
+    replay_index = seed
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, odds)[0]
+        if name == "replay":
+            entry = replay[replay_index % len(replay)]
+            replay_index += 1
+            label = f"replay {entry['method'].upper()} {entry['path'].split('?')[0]}"
+            request = http.request(
+                entry["method"], entry["path"], json=entry.get("json"),
+                params=entry.get("params"), headers=entry.get("headers"),
+            )
+        else:
+            label, request = OPERATIONS[name](http, rng, rows)
+        start = time.perf_counter()
+        try:
+            status = (await request).status_code
+        except Exception as exc:
+            status = type(exc).__name__
+        recorder.record(label, status, time.perf_counter() - start)
+
+async def sse_subscriber(token: str, stats: dict, stop: asyncio.Event) -> None:
+    """Hold one /books/stream response open by driving the ASGI app directly:
+    httpx's in-process transport buffers whole bodies, so it can't stream."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/v1/books/stream",
+        "raw_path": b"/api/v1/books/stream", "query_string": b"", "root_path": "",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    started = time.perf_counter()
+    first_event = asyncio.Event()
+
+    async def receive():
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            stats["events"] += message["body"].count(b"event: ")
+            if not first_event.is_set():
+                first_event.set()
+                stats["connect_ms"].append((time.perf_counter() - started) * 1000)
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        stats["failed"] += 1
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    replay, skipped = load_replay(args.replay) if args.replay else ([], 0)
+    if replay:
+        weights.setdefault("replay", args.replay_weight)
+    elif "replay" in weights:
+        del weights["replay"]
+
+    recorder = Recorder()
+    sse_stats = {"events": 0, "failed": 0, "connect_ms": []}
+    token = create_access_token({"sub": USER["username"]})
+    stop = asyncio.Event()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            http.headers["Authorization"] = f"Bearer {token}"
+            subscribers = [asyncio.create_task(sse_subscriber(token, sse_stats, stop)) for _ in range(args.sse)]
+            await asyncio.sleep(0.1)
+            deadline = time.perf_counter() + args.duration
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                client_loop(http, weights, args.rows, replay, recorder, deadline, seed)
+                for seed in range(args.concurrency)
+            ])
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await asyncio.gather(*subscribers)
+
+    endpoints = recorder.report(elapsed)
+    total_requests = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "rows": args.rows,
+            "concurrency": args.concurrency,
+            "duration_seconds": round(elapsed, 2),
+            "mix": weights,
+            "sse_subscribers": args.sse,
+            "replay": {"file": args.replay, "requests": len(replay), "skipped_lines": skipped} if args.replay else None,
+        },
+        "total": {
+            "requests": total_requests,
+            "throughput_rps": round(total_requests / elapsed, 1),
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+        },
+        "endpoints": endpoints,
+        "sse": {
+            "subscribers": args.sse,
+            "failed": sse_stats["failed"],
+            "events_delivered": sse_stats["events"],
+            "first_event_p50_ms": round(percentile(sse_stats["connect_ms"], 50), 2),
+        },
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print per-endpoint changes against ``baseline``; return the regressions."""
+    regressions = []
+    print(f"{'endpoint':<28}" + "".join(f"{name:>28}" for name in ("rps", "p50 ms", "p99 ms")))
+    for label, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(label)
+        if before is None:
+            print(f"{label:<28}{'(new)':>28}")
+            continue
+        cells = []
+        for key, higher_is_worse in (("throughput_rps", False), ("p50_ms", True), ("p99_ms", True)):
+            old, new = before[key], now[key]
+            change = (new - old) / old if old else 0.0
+            cells.append(f"{old} -> {new} ({change:+.0%})")
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if worse and key != "p50_ms":
+                regressions.append(f"{label} {key}: {old} -> {new}")
+        print(f"{label:<28}" + "".join(f"{cell:>28}" for cell in cells))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000, help="books seeded before the run")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent client loops")
+    parser.add_argument("--duration", type=float, default=15, help="seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--sse", type=int, default=20, help="SSE subscribers held open during the run")
+    parser.add_argument("--replay", help="JSONL file of recorded requests to mix in")
+    parser.add_argument("--replay-weight", type=float, default=10)
+    parser.add_argument("--output", help="where to write the JSON report (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    seed_books(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT OR IGNORE INTO users (username, hashed_password) VALUES (:username, :hashed)"),
+            {"username": USER["username"], "hashed": get_password_hash(USER["password"])},
+        )
+
+    report = asyncio.run(run(args))
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps({"total": report["total"], "sse": report["sse"]}, indent=2))
+    print(f"{'endpoint':<28}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label, stats in report["endpoints"].items():
+        print(f"{label:<28}{stats['throughput_rps']:>9}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+    print(f"Report written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
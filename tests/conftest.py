@@ -1,24 +1,46 @@
+import os
+import tempfile
 import pytest
 from typing import AsyncGenerator, Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.db.database import Base, get_db
+# Create test database. The sync and async engines must see the same data,
+# so it lives in a temporary file rather than in memory. Point the app at it
+# before importing so that nothing touches the bundled app/db/books.db.
+SQLALCHEMY_TEST_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["DATABASE_URL"] = SQLALCHEMY_TEST_DATABASE_URL
+# Tests make requests far faster than any client should; test_ratelimit.py
+# exercises the limiter on its own
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+# Deliver events within the request instead of through the shared log file;
+# test_events.py covers the sqlite backend
+os.environ["EVENT_BACKEND"] = "memory"
+
+from app.db.database import Base, get_db, get_read_db, get_async_database_url, get_read_session_factory
 from app.main import app
 from app.core.security import create_access_token
-
-# Create test database
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite://"  # In-memory database
+from app.core.counts import book_count
+from app.api.v1.endpoints.auth import user_cache
+from app.core.response_cache import response_cache
 
 engine = create_engine(
     SQLALCHEMY_TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
+    connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_TEST_DATABASE_URL),
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
@@ -31,13 +53,16 @@ def db():
 
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_session_factory] = lambda: TestingAsyncSessionLocal
+    book_count.invalidate()
+    user_cache.clear()
+    response_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
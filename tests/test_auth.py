@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.api.v1.endpoints.auth import invalidate_user, user_cache
+from app.core.errors import ServiceBusyError
+from app.core.security import PasswordHashPool
+
+def test_protected_reads_use_cached_identity(authorized_client, db):
+    assert authorized_client.get("/api/v1/books/").status_code == 200
+    hits = user_cache.hits
+
+    # With the identity cached, the users table is no longer consulted
+    db.execute(text("DELETE FROM users"))
+    db.commit()
+    assert authorized_client.get("/api/v1/books/").status_code == 200
+    assert user_cache.hits == hits + 1
+
+def test_invalidated_user_is_looked_up_again(authorized_client, db, test_user):
+    assert authorized_client.get("/api/v1/books/").status_code == 200
+
+    db.execute(text("DELETE FROM users"))
+    db.commit()
+    invalidate_user(test_user["username"])
+    assert authorized_client.get("/api/v1/books/").status_code == 401
+
+def test_cache_health_reports_auth_counters(authorized_client):
+    authorized_client.get("/api/v1/books/")
+    authorized_client.get("/api/v1/books/")
+
+    response = authorized_client.get("/api/v1/health/cache")
+    assert response.status_code == 200
+    stats = response.json()["details"]["auth"]
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_sheds_excess_load():
+    pool = PasswordHashPool(workers=1, queue_limit=1)
+    release = threading.Event()
+
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(ServiceBusyError):
+        await pool.run(release.wait)
+    assert pool.rejected == 1
+
+    release.set()
+    assert await asyncio.gather(*running) == [True, True]
+    assert pool.pending == 0
+
+def test_concurrent_registrations_of_one_name(client):
+    async def register_twice():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post("/api/v1/auth/register", json={"username": "twin", "password": "secret123"})
+                for _ in range(2)
+            ])
+
+    responses = client.portal.call(register_twice)
+    assert sorted(response.status_code for response in responses) == [200, 400]
+    rejected = next(response for response in responses if response.status_code == 400)
+    assert rejected.json()["error"]["message"] == "Username already registered"
+
+def test_login_checks_password(client, test_user):
+    response = client.post("/api/v1/auth/login", data=test_user)
+    assert response.status_code == 200
+    response = client.post(
+        "/api/v1/auth/login",
+        data={**test_user, "password": "wrong"}
+    )
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
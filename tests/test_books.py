@@ -1,5 +1,8 @@
+import json
 import pytest
 from fastapi import status
+from app.core.pagination import encode_cursor
+from app.schemas.book import PaginatedBooks
 
 @pytest.fixture
 def test_book():
@@ -66,4 +69,387 @@ def test_delete_book(authorized_client, test_book):
     # Delete it
     response = authorized_client.delete(f"/api/v1/books/{created_book['id']}")
     assert response.status_code == 200
-    assert response.json()["message"] == "Book deleted successfully"
\ No newline at end of file
+    assert response.json()["message"] == "Book deleted successfully"
+
+def test_get_books_cursor_pagination(authorized_client, test_book):
+    for i in range(55):
+        test_book["title"] = f"Book {i % 5}"
+        authorized_client.post("/api/v1/books/", json=test_book)
+
+    seen = []
+    response = authorized_client.get("/api/v1/books/?sort=title")
+    data = response.json()
+    assert len(data["items"]) == 50
+    assert data["next_cursor"] is not None
+    seen.extend(data["items"])
+
+    response = authorized_client.get(
+        f"/api/v1/books/?sort=title&cursor={data['next_cursor']}"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["page"] is None
+    assert data["next_cursor"] is None
+    seen.extend(data["items"])
+
+    assert len({book["id"] for book in seen}) == 55
+    keys = [(book["title"], book["id"]) for book in seen]
+    assert keys == sorted(keys)
+
+def test_get_books_cursor_rejects_mismatched_sort(authorized_client, test_book):
+    for i in range(51):
+        authorized_client.post("/api/v1/books/", json=test_book)
+    cursor = authorized_client.get("/api/v1/books/").json()["next_cursor"]
+
+    response = authorized_client.get(f"/api/v1/books/?sort=author&cursor={cursor}")
+    assert response.status_code == 422
+    response = authorized_client.get("/api/v1/books/?cursor=not-a-cursor")
+    assert response.status_code == 422
+    # Well-formed, but with a value no column can bind
+    forged = encode_cursor(["title", "id"], [{"a": 1}, 5])
+    response = authorized_client.get(f"/api/v1/books/?sort=title&cursor={forged}")
+    assert response.status_code == 422
+
+def test_get_books_without_total(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+
+    response = authorized_client.get("/api/v1/books/?include_total=false")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert data["pages"] is None
+    assert len(data["items"]) == 1
+
+def test_get_books_estimated_total_tracks_writes(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+    assert authorized_client.get("/api/v1/books/?total=estimate").json()["total"] == 1
+
+    created = authorized_client.post("/api/v1/books/", json=test_book).json()
+    assert authorized_client.get("/api/v1/books/?total=estimate").json()["total"] == 2
+
+    authorized_client.delete(f"/api/v1/books/{created['id']}")
+    assert authorized_client.get("/api/v1/books/?total=estimate").json()["total"] == 1
+
+def test_bulk_create_books_from_json_array(authorized_client, test_book):
+    books = [{**test_book, "title": f"Bulk {i}"} for i in range(5)]
+    response = authorized_client.post("/api/v1/books/bulk?chunk_size=2", json=books)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 5, "chunks": 3}
+
+    data = authorized_client.get("/api/v1/books/").json()
+    assert data["total"] == 5
+    assert [book["title"] for book in data["items"]] == [f"Bulk {i}" for i in range(5)]
+
+def test_bulk_create_books_from_ndjson(authorized_client, test_book):
+    body = "\n".join(json.dumps({**test_book, "title": f"Line {i}"}) for i in range(3))
+    response = authorized_client.post(
+        "/api/v1/books/bulk",
+        content=body + "\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 3, "chunks": 1}
+
+def test_bulk_create_books_reports_invalid_row(authorized_client, test_book):
+    books = [test_book, {**test_book, "title": None}]
+    response = authorized_client.post("/api/v1/books/bulk", json=books)
+    assert response.status_code == 422
+    assert "Row 2: title" in response.json()["error"]["message"]
+    assert authorized_client.get("/api/v1/books/").json()["total"] == 0
+
+def test_export_books_ndjson(authorized_client, test_book):
+    books = [{**test_book, "title": f"Export {i}"} for i in range(3)]
+    authorized_client.post("/api/v1/books/bulk", json=books)
+
+    response = authorized_client.get("/api/v1/books/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Export 0", "Export 1", "Export 2"]
+
+def test_export_books_csv_gzip(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+
+    response = authorized_client.get("/api/v1/books/export?format=csv&compress=true")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    lines = response.text.splitlines()
+    assert lines[0] == "id,title,author,published_date,summary,genre"
+    assert lines[1].startswith("1,Test Book,Test Author")
+
+def test_search_books_ranked(authorized_client, test_book):
+    books = [
+        {**test_book, "title": "Gardening Basics", "summary": "Dragons appear briefly"},
+        {**test_book, "title": "The Dragon Reborn", "summary": "Epic fantasy"},
+        {**test_book, "title": "Cooking", "summary": "Recipes"},
+    ]
+    authorized_client.post("/api/v1/books/bulk", json=books)
+
+    response = authorized_client.get("/api/v1/books/search?q=dragon*&include_total=true")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert [book["title"] for book in data["items"]] == ["The Dragon Reborn", "Gardening Basics"]
+
+def test_search_books_tracks_updates_and_deletes(authorized_client, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    authorized_client.put(f"/api/v1/books/{book_id}", json={**test_book, "title": "Renamed Volume"})
+
+    assert authorized_client.get("/api/v1/books/search?q=renamed").json()["items"][0]["id"] == book_id
+    assert authorized_client.get("/api/v1/books/search?q=test book").json()["items"] == []
+
+    authorized_client.delete(f"/api/v1/books/{book_id}")
+    assert authorized_client.get("/api/v1/books/search?q=renamed").json()["items"] == []
+
+def test_search_books_pagination_and_syntax(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/bulk", json=[test_book] * 3)
+
+    response = authorized_client.get('/api/v1/books/search?q="test" (author&limit=2&page=2')
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+
+    assert authorized_client.get("/api/v1/books/search?q=***").status_code == 422
+
+def test_get_books_filters(authorized_client, test_book):
+    books = [
+        {**test_book, "genre": "Fantasy", "published_date": "1990-05-01"},
+        {**test_book, "genre": "Fantasy", "published_date": "2005-05-01"},
+        {**test_book, "genre": "History", "published_date": "2005-06-01"},
+        {**test_book, "genre": "Fantasy", "author": "Someone Else", "published_date": "2010-01-01"},
+    ]
+    authorized_client.post("/api/v1/books/bulk", json=books)
+
+    response = authorized_client.get(
+        "/api/v1/books/?genre=Fantasy&author=Test Author&published_from=2000-01-01&published_to=2005-12-31"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["published_date"] == "2005-05-01"
+
+    response = authorized_client.get("/api/v1/books/?published_from=2005-01-01&published_to=2000-01-01")
+    assert response.status_code == 422
+
+def test_get_books_descending_date_cursor(authorized_client, test_book):
+    books = [{**test_book, "published_date": f"20{i % 10:02d}-01-01"} for i in range(55)]
+    books.append({**test_book, "published_date": None})
+    authorized_client.post("/api/v1/books/bulk", json=books)
+
+    data = authorized_client.get("/api/v1/books/?sort=-published_date").json()
+    seen = data["items"]
+    data = authorized_client.get(
+        f"/api/v1/books/?sort=-published_date&cursor={data['next_cursor']}"
+    ).json()
+    seen.extend(data["items"])
+
+    assert len({book["id"] for book in seen}) == 56
+    dates = [book["published_date"] for book in seen]
+    assert dates[-1] is None
+    assert dates[:-1] == sorted(dates[:-1], reverse=True)
+
+@pytest.mark.parametrize("sort", [
+    "-published_date", "published_date", "-title,-published_date",
+    "title,-published_date", "-published_date,title", "-genre,-title",
+])
+def test_get_books_cursor_pages_match_full_order(authorized_client, test_book, sort):
+    dates = [None, "2000-01-01", "2001-01-01"]
+    books = [
+        {**test_book, "title": "AB"[i % 2], "genre": "XY"[i % 5 % 2], "published_date": dates[i % 3]}
+        for i in range(130)
+    ]
+    authorized_client.post("/api/v1/books/bulk", json=books)
+
+    seen = []
+    url = f"/api/v1/books/?sort={sort}&include_total=false"
+    data = authorized_client.get(url).json()
+    seen.extend(data["items"])
+    while data["next_cursor"]:
+        data = authorized_client.get(f"{url}&cursor={data['next_cursor']}").json()
+        seen.extend(data["items"])
+
+    # SQLite's order: NULLs first ascending and last descending, ties by id
+    keys = sort.split(",")
+    expected = sorted(seen, key=lambda book: book["id"], reverse=keys[-1].startswith("-"))
+    for key in reversed(keys):
+        name = key.removeprefix("-")
+        expected.sort(
+            key=lambda book: (book[name] is not None, book[name] or ""), reverse=key.startswith("-")
+        )
+    assert [book["id"] for book in seen] == [book["id"] for book in expected]
+    assert len(seen) == 130
+
+def test_get_book_conditional(authorized_client, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+
+    response = authorized_client.get(f"/api/v1/books/{book_id}")
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+    assert etag == f'"{book_id}.1"'
+
+    response = authorized_client.get(f"/api/v1/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = authorized_client.get(f"/api/v1/books/{book_id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    authorized_client.put(f"/api/v1/books/{book_id}", json={**test_book, "title": "Changed"})
+    response = authorized_client.get(f"/api/v1/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{book_id}.2"'
+
+def test_get_books_conditional(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+
+    etag = authorized_client.get("/api/v1/books/?genre=Test Genre").headers["etag"]
+    response = authorized_client.get("/api/v1/books/?genre=Test Genre", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert authorized_client.get("/api/v1/books/?genre=Other", headers={"If-None-Match": etag}).status_code == 200
+
+    authorized_client.post("/api/v1/books/", json=test_book)
+    response = authorized_client.get("/api/v1/books/?genre=Test Genre", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+def test_update_and_delete_if_match(authorized_client, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    etag = authorized_client.get(f"/api/v1/books/{book_id}").headers["etag"]
+
+    response = authorized_client.put(
+        f"/api/v1/books/{book_id}", json={**test_book, "title": "First"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+
+    response = authorized_client.put(
+        f"/api/v1/books/{book_id}", json={**test_book, "title": "Second"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 412
+    assert authorized_client.delete(f"/api/v1/books/{book_id}", headers={"If-Match": etag}).status_code == 412
+    assert authorized_client.delete(f"/api/v1/books/{book_id}", headers={"If-Match": new_etag}).status_code == 200
+
+def test_etag_not_reused_after_delete(authorized_client, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    etag = authorized_client.get(f"/api/v1/books/{book_id}").headers["etag"]
+    authorized_client.delete(f"/api/v1/books/{book_id}")
+
+    # The newest book was deleted, yet the next one gets a new id and ETag
+    new_id = authorized_client.post("/api/v1/books/", json={**test_book, "title": "Other"}).json()["id"]
+    assert new_id != book_id
+    response = authorized_client.get(f"/api/v1/books/{new_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert authorized_client.delete(f"/api/v1/books/{new_id}", headers={"If-Match": etag}).status_code == 412
+
+def test_list_fast_path_matches_schema(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+    authorized_client.post("/api/v1/books/", json={**test_book, "title": "Ünïcode", "published_date": None})
+
+    # Rows are encoded without the schema; the bytes must be what it would produce
+    for url in ("/api/v1/books/", "/api/v1/books/search?q=test"):
+        response = authorized_client.get(url)
+        assert response.status_code == 200
+        assert response.content == PaginatedBooks.model_validate(response.json()).model_dump_json().encode()
+
+def test_get_books_batch(authorized_client, test_book):
+    first = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    second = authorized_client.post("/api/v1/books/", json={**test_book, "title": "Second"}).json()["id"]
+    # Cache one of them, so the batch mixes cached and queried books
+    single = authorized_client.get(f"/api/v1/books/{second}")
+
+    response = authorized_client.get(f"/api/v1/books/batch?ids={second},999&ids={first}&ids={second}")
+    assert response.status_code == 200
+    body = response.json()
+    assert [book["id"] for book in body["items"]] == [second, first]
+    assert body["items"][0] == single.json()
+    assert body["missing"] == [999]
+    # Books fetched by the batch are served from the cache afterwards
+    assert authorized_client.get(f"/api/v1/books/{first}").json() == body["items"][1]
+
+def test_get_books_batch_validation(authorized_client, monkeypatch):
+    assert authorized_client.get("/api/v1/books/batch").status_code == 422
+    assert authorized_client.get("/api/v1/books/batch?ids=x").status_code == 422
+    monkeypatch.setattr("app.api.v1.endpoints.books.settings.BATCH_GET_MAX_IDS", 2)
+    assert authorized_client.get("/api/v1/books/batch?ids=1,2,3").status_code == 422
+
+def test_book_facets_track_writes(authorized_client, test_book):
+    fantasy = {**test_book, "genre": "Fantasy", "author": "Tolkien"}
+    first = authorized_client.post("/api/v1/books/", json=fantasy).json()["id"]
+    authorized_client.post("/api/v1/books/bulk", json=[fantasy, {**fantasy, "author": "Le Guin"}, test_book])
+    authorized_client.put(f"/api/v1/books/{first}", json={**fantasy, "genre": "Classics"})
+    authorized_client.delete(f"/api/v1/books/{first}")
+
+    response = authorized_client.get("/api/v1/books/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "genre": [{"value": "Fantasy", "count": 2}, {"value": "Test Genre", "count": 1}],
+        "author": [
+            {"value": "Le Guin", "count": 1}, {"value": "Test Author", "count": 1},
+            {"value": "Tolkien", "count": 1},
+        ],
+    }
+    only_genre = authorized_client.get("/api/v1/books/facets?facet=genre&limit=1")
+    assert only_genre.json() == {"genre": [{"value": "Fantasy", "count": 2}]}
+    assert authorized_client.get(
+        "/api/v1/books/facets", headers={"If-None-Match": response.headers["etag"]}
+    ).status_code == 304
+
+def test_book_facets_rebuild_matches_incremental(authorized_client, test_book, db):
+    from app.db.facets import book_facets, rebuild_facets
+    books = [{**test_book, "genre": f"g{i % 3}", "author": f"a{i % 4}"} for i in range(12)]
+    authorized_client.post("/api/v1/books/bulk?chunk_size=5", json=books)
+    authorized_client.put("/api/v1/books/1", json={**test_book, "genre": "g9"})
+    authorized_client.delete("/api/v1/books/2")
+
+    def counts():
+        return set(db.execute(book_facets.select()).all())
+    incremental = counts()
+    rebuild_facets(db.connection())
+    assert counts() == incremental
+    db.rollback()
+
+def test_book_changes_feed(authorized_client, test_book):
+    start = authorized_client.get("/api/v1/books/changes").json()
+    assert start == {"changes": [], "next_since": 0, "has_more": False}
+
+    first = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    authorized_client.put(f"/api/v1/books/{first}", json={**test_book, "title": "Renamed"})
+    authorized_client.post("/api/v1/books/bulk", json=[test_book, test_book])
+    authorized_client.delete(f"/api/v1/books/{first}")
+
+    page = authorized_client.get("/api/v1/books/changes?since=0&limit=2").json()
+    assert [(change["op"], change["book_id"]) for change in page["changes"]] == [("created", first), ("updated", first)]
+    assert page["has_more"]
+    # Books carry their current state, which for a deleted book is none
+    assert page["changes"][1]["version"] == 2
+    assert page["changes"][1]["book"] is None
+
+    rest = authorized_client.get(f"/api/v1/books/changes?since={page['next_since']}&include_books=false").json()
+    assert [change["op"] for change in rest["changes"]] == ["created", "created", "deleted"]
+    assert rest["changes"][0]["book_id"] == first + 1
+    assert "book" not in rest["changes"][0]
+    assert not rest["has_more"]
+    caught_up = authorized_client.get(f"/api/v1/books/changes?since={rest['next_since']}").json()
+    assert caught_up["changes"] == [] and caught_up["next_since"] == rest["next_since"]
+
+def test_book_changes_compaction(authorized_client, test_book, db):
+    from app.db.changes import compact_change_log
+    first = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    authorized_client.put(f"/api/v1/books/{first}", json={**test_book, "title": "Renamed"})
+    authorized_client.post("/api/v1/books/", json=test_book)
+
+    assert compact_change_log(db.connection(), retention_seconds=3600) == {"superseded": 1, "expired": 0}
+    db.commit()
+    body = authorized_client.get("/api/v1/books/changes?since=0").json()
+    assert [(change["seq"], change["op"]) for change in body["changes"]] == [(2, "updated"), (3, "created")]
+    assert body["changes"][0]["book"]["title"] == "Renamed"
+
+    # Past retention: readers behind the compacted entries must resync
+    assert compact_change_log(db.connection(), retention_seconds=-1) == {"superseded": 0, "expired": 2}
+    db.commit()
+    gone = authorized_client.get("/api/v1/books/changes?since=2")
+    assert gone.status_code == 410
+    assert authorized_client.get("/api/v1/books/changes").json()["next_since"] == 3
+    assert authorized_client.get("/api/v1/books/changes?since=3").json()["changes"] == []
+    # seq keeps growing after the log was emptied
+    authorized_client.delete(f"/api/v1/books/{first}")
+    assert authorized_client.get("/api/v1/books/changes?since=3").json()["changes"][0]["seq"] == 4
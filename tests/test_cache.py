@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.cache import TTLCache
+from app.core.response_cache import response_cache
+
+@pytest.fixture
+def test_book():
+    return {
+        "title": "Cached Book",
+        "author": "Test Author",
+        "published_date": "2024-01-17",
+        "summary": "Test summary",
+        "genre": "Test Genre"
+    }
+
+def test_ttl_cache_byte_bound():
+    cache = TTLCache(maxsize=10, ttl=60, max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"123")
+    assert cache.get("a") is None
+    assert cache.get("b") == b"12345"
+    assert cache.bytes == 8
+    assert cache.evictions == 1
+
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert cache.stats()["max_bytes"] == 10
+
+def test_single_books_not_cached(authorized_client, db, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    authorized_client.get(f"/api/v1/books/{book_id}")
+    authorized_client.get("/api/v1/books/batch", params={"ids": book_id})
+    assert response_cache.stats()["size"] == 0
+
+def test_book_reads_see_writes_from_other_workers(authorized_client, db, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    old = authorized_client.get(f"/api/v1/books/{book_id}")
+    authorized_client.get("/api/v1/books/batch", params={"ids": book_id})
+
+    # Another worker's write, before its event reaches this worker
+    db.execute(text("UPDATE books SET title = 'Elsewhere', version = version + 1"))
+    db.commit()
+    response = authorized_client.get(f"/api/v1/books/{book_id}", headers={"If-None-Match": old.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Elsewhere"
+    assert response.headers["etag"] != old.headers["etag"]
+    batch = authorized_client.get("/api/v1/books/batch", params={"ids": book_id}).json()
+    assert batch["items"][0]["title"] == "Elsewhere"
+
+    db.execute(text("DELETE FROM books"))
+    db.commit()
+    assert authorized_client.get(f"/api/v1/books/{book_id}").status_code == 404
+    assert authorized_client.get("/api/v1/books/batch", params={"ids": book_id}).json()["missing"] == [book_id]
+
+def test_list_cache_keyed_by_catalog_version(authorized_client, db, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+    authorized_client.get("/api/v1/books/")
+    hits = response_cache.hits
+    assert authorized_client.get("/api/v1/books/").json()["total"] == 1
+    assert response_cache.hits == hits + 1
+
+    # Any write, even one that bypasses the API, moves the catalog version on
+    db.execute(text("INSERT INTO books (title, author, summary, genre, version) VALUES ('Direct', 'A', 'S', 'G', 1)"))
+    db.commit()
+    assert authorized_client.get("/api/v1/books/").json()["total"] == 2
+
+    stats = authorized_client.get("/api/v1/health/cache").json()["details"]["responses"]
+    assert stats["bytes"] > 0
+    assert stats["hit_ratio"] > 0
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db.database import AsyncSessionLocal, ReadSessionLocal, async_engine, read_engine
+
+@pytest.mark.asyncio
+async def test_connections_apply_tuning_profile():
+    try:
+        async with ReadSessionLocal() as session:
+            assert (await session.scalar(text("PRAGMA journal_mode"))) == "wal"
+            assert (await session.scalar(text("PRAGMA synchronous"))) == 1  # NORMAL
+            assert (await session.scalar(text("PRAGMA busy_timeout"))) == 5000
+            assert (await session.scalar(text("PRAGMA temp_store"))) == 2  # MEMORY
+            assert (await session.scalar(text("PRAGMA query_only"))) == 1
+        async with AsyncSessionLocal() as session:
+            assert (await session.scalar(text("PRAGMA query_only"))) == 0
+    finally:
+        await read_engine.dispose()
+        await async_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_pool_rejects_writes(db):
+    try:
+        async with ReadSessionLocal() as session:
+            with pytest.raises(OperationalError, match="readonly"):
+                await session.execute(text("INSERT INTO books (title) VALUES ('nope')"))
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("INSERT INTO books (title) VALUES ('yes')"))
+            await session.commit()
+        async with ReadSessionLocal() as session:
+            assert (await session.scalar(text("SELECT count(*) FROM books"))) == 1
+    finally:
+        await read_engine.dispose()
+        await async_engine.dispose()
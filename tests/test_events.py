@@ -0,0 +1,193 @@
+import asyncio
+import pytest
+
+from app.core.events import (
+    BookEvent,
+    InProcessBackend,
+    SQLiteLogBackend,
+    Subscriber,
+    broadcast_backend,
+    get_events_since,
+    recent_events,
+)
+
+async def wait_for(received, count, timeout=2.0):
+    async def poll():
+        while len(received) < count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_reaches_every_worker(tmp_path):
+    """Two backends on one log file stand in for two gunicorn workers"""
+    path = str(tmp_path / "events.db")
+    first, second = [], []
+
+    async def deliver_first(message):
+        first.append(message)
+
+    async def deliver_second(message):
+        second.append(message)
+
+    worker_a = SQLiteLogBackend(path, 0.01, 60, deliver=deliver_first)
+    worker_b = SQLiteLogBackend(path, 0.01, 60, deliver=deliver_second)
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        await worker_a.publish({"event": "created", "book_id": 1})
+        await worker_b.publish({"event": "deleted", "book_id": 1})
+        await wait_for(first, 2)
+        await wait_for(second, 2)
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+    assert [m["event"] for m in first] == ["created", "deleted"]
+    assert first == second
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_skips_events_before_start(tmp_path):
+    path = str(tmp_path / "events.db")
+    received = []
+
+    async def deliver(message):
+        received.append(message)
+
+    publisher = SQLiteLogBackend(path, 0.01, 60, deliver=deliver)
+    await publisher.publish({"event": "created", "book_id": 1})
+    await publisher.stop()
+    received.clear()
+
+    late_worker = SQLiteLogBackend(path, 0.01, 60, deliver=deliver)
+    await late_worker.start()
+    try:
+        await late_worker.publish({"event": "updated", "book_id": 1})
+        await wait_for(received, 1)
+    finally:
+        await late_worker.stop()
+
+    assert [m["event"] for m in received] == ["updated"]
+
+def book_event(event_id, event, book_id):
+    return BookEvent.encode({"id": event_id, "event": event, "book_id": book_id})
+
+def test_book_event_frame_is_a_complete_sse_message():
+    event = book_event(7, "updated", 3)
+    assert event.frame.startswith(b"id: 7\r\nevent: updated\r\ndata: ")
+    assert event.frame.endswith(b"\r\n\r\n")
+    assert event.decode() == {"id": 7, "event": "updated", "book_id": 3}
+
+def test_subscriber_drop_oldest_keeps_newest():
+    subscriber = Subscriber("client", maxsize=2, policy="drop_oldest")
+    for book_id in range(3):
+        assert subscriber.offer(book_event(book_id, "updated", book_id))
+
+    assert subscriber.depth == 2
+    assert subscriber.dropped == 1
+    assert [e.book_id for e in subscriber._pending.values()] == [1, 2]
+
+def test_subscriber_coalesces_per_book():
+    subscriber = Subscriber("client", maxsize=10, policy="coalesce")
+    subscriber.offer(book_event(1, "created", 1))
+    subscriber.offer(book_event(2, "created", 2))
+    subscriber.offer(book_event(3, "updated", 1))
+
+    pending = list(subscriber._pending.values())
+    assert [(e.event, e.book_id) for e in pending] == [("created", 2), ("updated", 1)]
+    assert subscriber.dropped == 1
+
+@pytest.mark.asyncio
+async def test_subscriber_disconnect_policy_evicts_slow_client():
+    subscriber = Subscriber("client", maxsize=1, policy="disconnect")
+    assert subscriber.offer(book_event(1, "created", 1))
+    assert not subscriber.offer(book_event(2, "created", 2))
+
+    assert subscriber.closed
+    assert await subscriber.get() is None
+
+def test_stream_health_reports_queue_metrics(client):
+    response = client.get("/api/v1/health/stream")
+    assert response.status_code == 200
+    details = response.json()["details"]
+    assert details["subscribers"] == 0
+    assert "dropped" in details and "queue_depth_max" in details
+
+@pytest.mark.asyncio
+async def test_replay_log_returns_missed_events():
+    recent_events.clear()
+    backend = InProcessBackend()
+    for book_id in range(5):
+        await backend.publish({"event": "created", "book_id": book_id})
+
+    ids = [event.id for event in recent_events]
+    assert ids == sorted(ids)
+    missed = get_events_since(ids[1])
+    assert [event.book_id for event in missed] == [2, 3, 4]
+    assert get_events_since(ids[-1]) == []
+
+@pytest.mark.asyncio
+async def test_replay_log_requests_resync_outside_window():
+    recent_events.clear()
+    # A worker that has delivered nothing yet still knows the head
+    assert get_events_since(broadcast_backend.head) == []
+    assert get_events_since(broadcast_backend.head + 1) is None
+
+    for book_id in range(3):
+        await broadcast_backend.publish({"event": "created", "book_id": book_id})
+    newest = recent_events[-1].id
+    assert get_events_since(newest + 1) is None
+    recent_events.popleft()
+    assert get_events_since(recent_events[0].id - 2) is None
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_replays_from_shared_log(tmp_path):
+    path = str(tmp_path / "events.db")
+
+    async def deliver(message):
+        pass
+
+    publisher = SQLiteLogBackend(path, 0.01, 60, deliver=deliver)
+    for book_id in range(3):
+        await publisher.publish({"event": "created", "book_id": book_id})
+    await publisher.stop()
+
+    # A worker started after those events has none of them in memory
+    restarted = SQLiteLogBackend(path, 0.01, 60, deliver=deliver)
+    await restarted.start()
+    try:
+        head = restarted.head
+        assert [event.book_id for event in await restarted.events_since(head - 2)] == [1, 2]
+        assert await restarted.events_since(head) == []
+        assert await restarted.events_since(head + 1) is None
+
+        await restarted._conn.execute("DELETE FROM book_events WHERE id < ?", (head,))
+        assert await restarted.events_since(head - 2) is None
+        assert [event.book_id for event in await restarted.events_since(head - 1)] == [2]
+    finally:
+        await restarted.stop()
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_replay_ahead_of_local_poller(tmp_path):
+    path = str(tmp_path / "events.db")
+
+    async def deliver(message):
+        pass
+
+    # The second worker's poller has not caught up with the first's publish
+    lagging = SQLiteLogBackend(path, 60, 60, deliver=deliver)
+    await lagging.start()
+    publisher = SQLiteLogBackend(path, 0.01, 60, deliver=deliver)
+    try:
+        await publisher.publish({"event": "created", "book_id": 1})
+        assert lagging.head == 0
+        assert await lagging.events_since(1) == []
+        assert [event.book_id for event in await lagging.events_since(0)] == [1]
+        assert await lagging.events_since(2) is None
+
+        # Pruning everything leaves the head where it was
+        await lagging._conn.execute("DELETE FROM book_events")
+        assert await lagging.events_since(1) == []
+        assert await lagging.events_since(0) is None
+    finally:
+        await publisher.stop()
+        await lagging.stop()
@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import queue
+
+from app.core.logs import (
+    DroppingQueueHandler, JsonFormatter, RequestIdFilter, SamplingFilter, configure_logging, stop_logging
+)
+
+def make_record(level: int = logging.INFO, msg: str = "hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(make_record(request_id="abc", returned=50)))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc"
+    assert entry["returned"] == 50
+
+def test_rate_limit_suppresses_and_reports():
+    limiter = SamplingFilter(per_second=2)
+    assert [limiter.filter(make_record()) for _ in range(3)] == [True, True, False]
+    # Warnings always get through
+    assert limiter.filter(make_record(logging.WARNING))
+
+    limiter._refilled_at -= 1  # a second later
+    record = make_record()
+    assert limiter.filter(record)
+    assert record.suppressed == 1
+
+def test_sampling_keeps_a_share():
+    sampler = SamplingFilter(rate=0.1)
+    kept = sum(sampler.filter(make_record()) for _ in range(2000))
+    assert 100 < kept < 300
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "hello world"
+
+def test_request_id_reaches_records(authorized_client, test_book):
+    authorized_client.post("/api/v1/books/", json=test_book)
+    handler = DroppingQueueHandler(queue.Queue())
+    handler.addFilter(RequestIdFilter())
+    books_logger = logging.getLogger("app.api.v1.endpoints.books")
+    books_logger.addHandler(handler)
+    books_logger.setLevel(logging.DEBUG)
+    try:
+        response = authorized_client.get("/api/v1/books/", headers={"X-Request-ID": "trace-42"})
+    finally:
+        books_logger.removeHandler(handler)
+        books_logger.setLevel(logging.NOTSET)
+
+    assert response.headers["x-request-id"] == "trace-42"
+    record = handler.queue.get_nowait()
+    assert record.request_id == "trace-42"
+    assert record.returned == 1
+
+def test_request_id_generated_when_missing_or_malformed(client):
+    generated = client.get("/api/v1/health").headers["x-request-id"]
+    assert len(generated) == 32
+    assert client.get("/api/v1/health", headers={"X-Request-ID": "bad id"}).headers["x-request-id"] != "bad id"
+
+def test_logging_restarts_in_forked_workers(tmp_path):
+    path = tmp_path / "worker.log"
+    with open(path, "w") as stream:
+        configure_logging(stream)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                # A gunicorn --preload worker: the parent's writer thread is gone
+                logging.getLogger("app.test").warning("from the worker")
+                stop_logging()
+                os._exit(0)
+            os.waitpid(pid, 0)
+        finally:
+            configure_logging()
+    assert json.loads(path.read_text())["message"] == "from the worker"
@@ -0,0 +1,72 @@
+import json
+import os
+import re
+import time
+
+from app.core.metrics import Gauge, Histogram, MetricsRegistry, SnapshotStore, merge_snapshots, render
+
+def sample(text: str, name: str, **labels) -> float | None:
+    """Value of one sample in exposition text, or None if absent."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if labels else "") + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/books")
+
+    text = render(registry.collect())
+    assert "# TYPE latency_seconds histogram" in text
+    assert sample(text, "latency_seconds_bucket", route="/books", le="0.1") == 2
+    assert sample(text, "latency_seconds_bucket", route="/books", le="1") == 3
+    assert sample(text, "latency_seconds_bucket", route="/books", le="+Inf") == 4
+    assert sample(text, "latency_seconds_count", route="/books") == 4
+    assert sample(text, "latency_seconds_sum", route="/books") == 3.65
+
+def test_worker_snapshots_merge(tmp_path):
+    def worker_snapshot(requests: int, depth: int) -> dict:
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(requests)
+        registry.gauge("depth_max", "Deepest queue", mode="max").set(depth)
+        registry.register(Histogram("latency_seconds", "Latency", buckets=(1.0,))).observe(0.5)
+        return registry.collect()
+
+    store = SnapshotStore(str(tmp_path), flush_seconds=5)
+    store.write(worker_snapshot(requests=3, depth=7))
+    (tmp_path / "other.json").write_text(json.dumps(worker_snapshot(requests=4, depth=2)))
+    stale = tmp_path / "gone.json"
+    stale.write_text(json.dumps(worker_snapshot(requests=100, depth=100)))
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+
+    text = render(merge_snapshots(store.read_all()))
+    assert sample(text, "requests_total") == 7
+    assert sample(text, "depth_max") == 7
+    assert sample(text, "latency_seconds_count") == 2
+    # A worker that stopped flushing no longer counts
+    assert not stale.exists()
+
+def test_gauge_defaults_to_sum():
+    gauge = Gauge("in_flight", "In flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.snapshot()["samples"] == [[[], 1]]
+
+def test_metrics_endpoint_reports_routes_and_queries(authorized_client, test_book):
+    book_id = authorized_client.post("/api/v1/books/", json=test_book).json()["id"]
+    before = authorized_client.get("/metrics").text
+    response = authorized_client.get(f"/api/v1/books/{book_id}")
+    assert re.match(r'db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+', response.headers["server-timing"])
+
+    text = authorized_client.get("/metrics").text
+    route = {"method": "GET", "route": "/api/v1/books/{book_id}"}
+    count = sample(text, "http_request_duration_seconds_count", **route)
+    assert count == (sample(before, "http_request_duration_seconds_count", **route) or 0) + 1
+    assert sample(text, "http_requests_total", **route, status="200") >= 1
+    assert sample(text, "db_queries_per_request_sum", **route) >= 1
+    assert sample(text, "password_hash_seconds_count", operation="hash") >= 1
+    assert sample(text, "sse_clients") == 0
+    assert sample(text, "http_requests_in_flight", method="GET") == 1  # the scrape itself
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from sqlalchemy import create_engine, text
+from app.db.migrations import migrate, parse_legacy_date
+
+def test_parse_legacy_date():
+    assert parse_legacy_date("March 5, 1999").isoformat() == "1999-03-05"
+    assert parse_legacy_date("17/01/2024").isoformat() == "2024-01-17"
+    assert parse_legacy_date("sometime") is None
+    # No day is made up for a bare year or month
+    assert parse_legacy_date("1999") is None
+    assert parse_legacy_date("1999-04") is None
+
+def test_migrate_legacy_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE books (id INTEGER PRIMARY KEY, title VARCHAR, author VARCHAR, "
+            "published_date VARCHAR, summary VARCHAR, genre VARCHAR)"
+        ))
+        conn.execute(text(
+            "INSERT INTO books (title, author, published_date, summary, genre) VALUES "
+            "('A', 'X', '2001-02-03', 's', 'g'), ('B', 'Y', '2001/02/30', 's', 'g'), "
+            "('C', 'Z', 'June 1, 1980', 's', 'g'), ('D', 'W', 'unknown', 's', 'g'), "
+            "('E', 'V', '1999', 's', 'g')"
+        ))
+
+    with engine.begin() as conn:
+        migrate(conn)
+    with engine.begin() as conn:
+        migrate(conn)  # idempotent
+
+    with engine.connect() as conn:
+        dates = conn.execute(text("SELECT published_date, legacy_published_date FROM books ORDER BY id")).all()
+        indexes = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        hits = conn.execute(text("SELECT rowid FROM books_fts WHERE books_fts MATCH 'z'")).scalars().all()
+        changes = conn.execute(text("SELECT COUNT(*) FROM book_changes")).scalar()
+        facets = conn.execute(text("SELECT facet, value, count FROM book_facets WHERE value IN ('g', 'X')")).all()
+    assert dates == [
+        ("2001-02-03", None), (None, "2001/02/30"), ("1980-06-01", "June 1, 1980"),
+        (None, "unknown"), (None, "1999")
+    ]
+    assert {"ix_books_published_date", "ix_books_genre_published_date", "ix_books_author_title"} <= set(indexes)
+    assert version == 4
+    assert hits == [3]
+    # The change log starts empty; the date fixes predate it
+    assert changes == 0
+    assert sorted(facets) == [("author", "X", 1), ("genre", "g", 5)]
+    with engine.begin() as conn:
+        # Ids are never reused once the table has AUTOINCREMENT
+        new_id = conn.execute(text(
+            "INSERT INTO books (title, author, summary, genre) VALUES ('F', 'U', 's', 'g') RETURNING id"
+        )).scalar()
+        conn.execute(text("DELETE FROM books WHERE id = :id"), {"id": new_id})
+        # The rebuilt table's triggers keep the search index and change log in step
+        conn.execute(text("INSERT INTO books (title, author, summary, genre) VALUES ('G', 'T', 's', 'g')"))
+        hits = conn.execute(text("SELECT rowid FROM books_fts WHERE books_fts MATCH 't'")).scalars().all()
+        logged = conn.execute(text("SELECT book_id, op FROM book_changes ORDER BY seq")).all()
+    assert new_id == 6
+    assert hits == [7]
+    assert logged == [(6, "created"), (6, "deleted"), (7, "created")]
+
+def test_import_leaves_schema_to_migrations(tmp_path):
+    path = tmp_path / "fresh.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    # Importing the app (as gunicorn --preload does in its master) touches no database
+    subprocess.run([sys.executable, "-c", "import app.main"], env=env, check=True)
+    assert not path.exists()
+
+    subprocess.run([sys.executable, "-m", "app.db.migrations"], env=env, check=True, capture_output=True)
+    with create_engine(f"sqlite:///{path}").connect() as conn:
+        tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+    assert {"books", "users", "books_fts", "book_changes", "book_facets"} <= set(tables)
+    assert version == 4
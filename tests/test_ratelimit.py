@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.ratelimit import (
+    Budget, MemoryBuckets, RateLimiter, RateLimitMiddleware, SQLiteBuckets, client_address, client_key,
+    parse_route_budgets, parse_trusted_proxies
+)
+from app.core.security import create_access_token
+
+def drain(buckets, key: str, budget: Budget, attempts: int) -> list[bool]:
+    return [buckets.take(key, budget) == 0 for _ in range(attempts)]
+
+def test_memory_bucket_bursts_then_refills():
+    buckets = MemoryBuckets(max_keys=10)
+    budget = Budget(rate=1, burst=3)
+    assert drain(buckets, "a", budget, 4) == [True, True, True, False]
+    assert 0 < buckets.take("a", budget) <= 1
+    # Other clients have their own bucket
+    assert buckets.take("b", budget) == 0
+
+    buckets._buckets["a"][1] -= 2  # two seconds pass
+    assert drain(buckets, "a", budget, 3) == [True, True, False]
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+    budget = Budget(rate=0.01, burst=4)
+    assert drain(first, "a", budget, 2) == [True, True]
+    # A second worker sees the same bucket
+    assert drain(second, "a", budget, 3) == [True, True, False]
+    assert first.take("a", budget) > 0
+
+def test_parse_route_budgets():
+    assert parse_route_budgets("POST /api/v1/auth/login=0.5:5, get /x=2") == {
+        ("POST", "/api/v1/auth/login"): Budget(0.5, 5),
+        ("GET", "/x"): Budget(2, 2),
+    }
+
+def test_client_key_trusts_only_verified_tokens():
+    def scope(token: str) -> dict:
+        return {"headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope(create_access_token({"sub": "alice"}))) == "user:alice"
+    assert client_key(scope("forged.token.value")) == "ip:10.0.0.1"
+
+def test_client_address_looks_through_trusted_proxies():
+    def scope(peer: str, forwarded: str | None = None) -> dict:
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"headers": headers, "client": (peer, 1234)}
+    proxies = parse_trusted_proxies("10.0.0.0/8")
+    # The client made up the first hop; the trusted proxy appended the real one
+    assert client_address(scope("10.0.0.1", "1.2.3.4, 203.0.113.9"), proxies) == "203.0.113.9"
+    assert client_address(scope("10.0.0.1", "203.0.113.9, 10.0.0.2"), proxies) == "203.0.113.9"
+    assert client_address(scope("10.0.0.1"), proxies) == "10.0.0.1"
+    # Anyone else's header is ignored
+    assert client_address(scope("198.51.100.7", "1.2.3.4"), proxies) == "198.51.100.7"
+    assert client_address(scope("198.51.100.7", "1.2.3.4"), parse_trusted_proxies("")) == "198.51.100.7"
+    assert client_address(scope("198.51.100.7", "1.2.3.4, 203.0.113.9"), parse_trusted_proxies("*")) == "203.0.113.9"
+
+@pytest.fixture
+def limited_app():
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/books")
+    async def books():
+        return {}
+
+    @app.post("/login")
+    async def login():
+        return {}
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    limiter = RateLimiter(
+        MemoryBuckets(100),
+        Budget(rate=0.001, burst=5),
+        {("POST", "/login"): Budget(rate=0.001, burst=1)},
+        max_concurrency=2,
+        exempt_paths=("/health",),
+    )
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, identify=lambda scope: "client")
+    return app, limiter, release
+
+@pytest.mark.asyncio
+async def test_middleware_limits_and_sheds(limited_app):
+    app, limiter, release = limited_app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # The login budget is separate from, and smaller than, the general one
+        assert (await client.post("/login")).status_code == 200
+        rejected = await client.post("/login")
+        assert rejected.status_code == 429
+        assert int(rejected.headers["retry-after"]) >= 1
+        assert rejected.json()["error"]["code"] == 429
+
+        slow = [asyncio.create_task(client.get("/slow")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert (await client.get("/books")).status_code == 503
+        release.set()
+        assert [response.status_code for response in await asyncio.gather(*slow)] == [200, 200]
+
+        # 3 of the 5 general tokens are spent; then the client is limited
+        assert [(await client.get("/books")).status_code for _ in range(3)] == [200, 200, 429]
+        assert (await client.get("/health")).status_code == 200
+    assert limiter.limited == 2
+    assert limiter.shed == 1